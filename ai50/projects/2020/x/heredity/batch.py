@@ -0,0 +1,152 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import heredity
+
+# Estimated cost above which "auto" mode falls back to Gibbs sampling
+EXACT_COST = 10 ** 7
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run heredity inference over many pedigree CSVs, "
+                    "printing one JSON line per file as each finishes."
+    )
+    parser.add_argument("paths", nargs="+",
+                        help="CSV files, directories or glob patterns")
+    parser.add_argument("--mode", default="auto",
+                        choices=("auto",) + heredity.MODES)
+    parser.add_argument("--probs", help="JSON file overriding PROBS")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    probs = heredity.PROBS
+    if args.probs:
+        with open(args.probs) as f:
+            probs = parse_probs(json.load(f))
+
+    filenames = find_files(args.paths)
+    if not filenames:
+        sys.exit("No pedigree files found")
+    for result in run_batch(filenames, args.mode, probs, args.processes):
+        print(json.dumps(result), flush=True)
+
+
+def find_files(paths):
+    """
+    Expand directories and glob patterns in `paths` into a sorted list of
+    CSV files, without duplicates.
+    """
+    filenames = set()
+    for path in paths:
+        for match in glob.glob(path) or [path]:
+            if os.path.isdir(match):
+                filenames.update(glob.glob(os.path.join(match, "*.csv")))
+            elif os.path.isfile(match):
+                filenames.add(match)
+    return sorted(filenames)
+
+
+def parse_probs(data):
+    """
+    Convert PROBS loaded from JSON, where every key is a string, back
+    into the integer and boolean keys used by heredity.
+    """
+    return {
+        "gene": {int(g): p for g, p in data["gene"].items()},
+        "trait": {
+            int(g): {value.lower() == "true": p for value, p in trait.items()}
+            for g, trait in data["trait"].items()
+        },
+        "mutation": data["mutation"]
+    }
+
+
+def estimate_cost(people):
+    """
+    Estimate the cost of exact inference on `people`: the number of joint
+    assignments enumerated across all of its families.
+    """
+    return sum(
+        3 ** len(family) *
+        2 ** sum(person["trait"] is None for person in family.values())
+        for family in heredity.families(people)
+    )
+
+
+def run_batch(filenames, mode, probs, processes=None):
+    """
+    Solve every pedigree in `filenames` across a pool of `processes`
+    workers, yielding a result dictionary for each as soon as it is done.
+    Files are submitted cheapest first, so that quick files are not held
+    up behind expensive ones.
+    """
+    jobs = []
+    for filename in filenames:
+        try:
+            people = heredity.load_data(filename)
+        except (OSError, KeyError, ValueError) as error:
+            yield {"file": filename, "error": str(error)}
+            continue
+        cost = estimate_cost(people)
+        method = mode
+        if mode == "auto":
+            method = "exact" if cost <= EXACT_COST else "gibbs"
+        jobs.append((cost if method == "exact" else EXACT_COST,
+                     filename, people, method))
+    jobs.sort(key=lambda job: job[0])
+
+    # PROBS is handed to each worker once, not with every file
+    with ProcessPoolExecutor(processes, initializer=init_worker,
+                             initargs=(probs,)) as executor:
+        futures = {
+            executor.submit(solve, filename, people, method): filename
+            for _, filename, people, method in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as error:
+                yield {"file": futures[future], "error": str(error)}
+
+
+def init_worker(probs):
+    """
+    Install `probs` as heredity's PROBS and compile its tables once for
+    the lifetime of the worker.
+    """
+    heredity.PROBS = probs
+    heredity.probability_tables()
+
+
+def solve(filename, people, method):
+    """
+    Compute the distributions for one pedigree with `method`.
+    """
+    start = time.perf_counter()
+    result = {"file": filename, "mode": method}
+    if method == "exact":
+        # Families are solved in turn: this already runs inside a worker
+        probabilities = dict()
+        for family in heredity.families(people):
+            probabilities.update(heredity.infer(family))
+    else:
+        probabilities, diagnostics = heredity.approximate_probabilities(
+            people, method=method
+        )
+        result["diagnostics"] = diagnostics
+    result["seconds"] = time.perf_counter() - start
+    result["probabilities"] = {
+        person: probabilities[person] for person in people
+    }
+    return result
+
+
+if __name__ == "__main__":
+    main()
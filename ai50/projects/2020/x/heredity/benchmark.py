@@ -0,0 +1,131 @@
+import math
+import sys
+import time
+import tracemalloc
+
+from generate import generate_pedigree
+from heredity import (InferenceSession, approximate_probabilities, families,
+                      family_probabilities)
+
+# Pedigree shapes to benchmark, as (depth, branching, founders)
+SHAPES = [
+    (1, 1, 2),
+    (1, 2, 2),
+    (1, 2, 4),
+    (2, 1, 2),
+    (1, 3, 2),
+    (2, 1, 8),
+    (2, 2, 2),
+    (3, 2, 4),
+    (4, 2, 8)
+]
+
+# Fraction of people whose trait is observed
+EVIDENCE = 0.5
+
+# Largest family that exact modes are run on
+EXACT_LIMIT = 8
+
+# Settings for the approximate modes
+TARGET_SE = 0.01
+TIME_BUDGET = 5.0
+
+# Standard errors by which a mode may differ from the reference before
+# it is reported as disagreeing, and the least difference allowed, for
+# rounding in exact modes
+TOLERANCE_SE = 5
+TOLERANCE = 1e-9
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [seed]")
+    seed = int(sys.argv[1]) if len(sys.argv) == 2 else 0
+
+    print(f"{'people':>6} {'family':>6} {'mode':>10} {'seconds':>9} "
+          f"{'peak KiB':>9} {'std err':>9} {'max diff':>9} {'tolerance':>9}")
+    for depth, branching, founders in SHAPES:
+        people = generate_pedigree(depth, branching, founders, EVIDENCE, seed)
+        largest = max(len(family) for family in families(people))
+
+        reference = None
+        for mode, run in modes(largest):
+            (probabilities, error), seconds, peak = measure(run, people)
+            row = (f"{len(people):>6} {largest:>6} {mode:>10} {seconds:>9.3f} "
+                   f"{peak / 1024:>9.1f} {error:>9.4f}")
+            if reference is None:
+                reference = probabilities, error
+                print(f"{row} {'-':>9} {'-':>9}", flush=True)
+                continue
+
+            diff = difference(reference[0], probabilities)
+            tolerance = max(TOLERANCE_SE * math.hypot(reference[1], error),
+                            TOLERANCE)
+            print(f"{row} {diff:>9.4f} {tolerance:>9.4f}", flush=True)
+            if diff > tolerance:
+                sys.exit(f"{mode} disagrees with {modes(largest)[0][0]} "
+                         f"at {len(people)} people")
+
+
+def modes(largest):
+    """
+    Return (name, function) pairs for every inference mode that is
+    feasible for a pedigree whose largest family has `largest` people.
+    Each function returns the distributions and their standard error.
+    Differences are reported against the first mode returned.
+    """
+    def approximate(method):
+        def run(people):
+            probabilities, diagnostics = approximate_probabilities(
+                people, method=method, target_se=TARGET_SE,
+                time_budget=TIME_BUDGET
+            )
+            return probabilities, diagnostics["standard_error"]
+        return run
+
+    sampled = [(method, approximate(method))
+               for method in ("gibbs", "likelihood")]
+    if largest > EXACT_LIMIT:
+        return sampled
+    return [
+        # Serial, so that the memory of every family is traced
+        ("exact", lambda people: (
+            family_probabilities(people, processes=1), 0.0
+        )),
+        ("session", lambda people: (
+            InferenceSession(people).probabilities(), 0.0
+        ))
+    ] + sampled
+
+
+def measure(run, people):
+    """
+    Run inference, returning its result, wall time and peak memory
+    allocated while it ran.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    probabilities = run(people)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return probabilities, seconds, peak
+
+
+def difference(expected, actual):
+    """
+    Return the largest absolute difference between any two corresponding
+    probabilities.
+    """
+    return max(
+        abs(expected[person][field][value] - actual[person][field][value])
+        for person in expected
+        for field in expected[person]
+        for value in expected[person][field]
+    )
+
+
+if __name__ == "__main__":
+    main()
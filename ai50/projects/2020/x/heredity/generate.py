@@ -0,0 +1,88 @@
+import csv
+import random
+import sys
+
+from heredity import probability_tables, sample_gene
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in (5, 6):
+        sys.exit("Usage: python generate.py depth branching founders "
+                 "evidence [seed]")
+    depth, branching, founders = (int(arg) for arg in sys.argv[1:4])
+    evidence = float(sys.argv[4])
+    seed = int(sys.argv[5]) if len(sys.argv) == 6 else None
+
+    people = generate_pedigree(depth, branching, founders, evidence, seed)
+    write_data(people, sys.stdout)
+
+
+def generate_pedigree(depth, branching, founders, evidence, seed=None):
+    """
+    Generate a random pedigree in the format returned by `load_data`.
+
+    Generation 0 has `founders` people, paired off into couples. Every
+    couple has `branching` children, and each child marries a new founder
+    to form a couple of the next generation, for `depth` generations.
+    Genes and traits are sampled from PROBS, and each trait is then kept
+    as evidence with probability `evidence`.
+    """
+    rng = random.Random(seed)
+    tables = probability_tables()
+    people = dict()
+    genes = dict()
+
+    def add_person(mother=None, father=None):
+        name = f"P{len(people)}"
+        if mother is None:
+            genes[name] = sample_gene(rng, tables["gene"])
+        else:
+            genes[name] = sample_gene(
+                rng, tables["inherit"][genes[mother]][genes[father]]
+            )
+        trait = rng.random() < tables["trait"][genes[name]][True]
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "trait": trait if rng.random() < evidence else None
+        }
+        return name
+
+    children = [add_person() for _ in range(founders)]
+    couples = list(zip(children[::2], children[1::2]))
+    for level in range(depth):
+        if level:
+            couples = [
+                (child, add_person()) if rng.random() < 0.5 else
+                (add_person(), child)
+                for child in children
+            ]
+        children = [
+            add_person(mother, father)
+            for mother, father in couples
+            for _ in range(branching)
+        ]
+
+    return people
+
+
+def write_data(people, f):
+    """
+    Write `people` to file object `f` as a CSV readable by `load_data`.
+    """
+    writer = csv.writer(f)
+    writer.writerow(["name", "mother", "father", "trait"])
+    for person in people.values():
+        writer.writerow([
+            person["name"],
+            person["mother"] or "",
+            person["father"] or "",
+            "" if person["trait"] is None else int(person["trait"])
+        ])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 import csv
-import itertools
+import math
+import os
+import random
+import statistics
 import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
 
 PROBS = {
 
@@ -36,53 +42,43 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Number of independent families above which they are solved in parallel
+PARALLEL_FAMILIES = 4
 
-def main():
-
-    # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+# Conditional probability tables compiled from each PROBS configuration
+COMPILED_TABLES = dict()
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
-        person: {
-            "gene": {
-                2: 0,
-                1: 0,
-                0: 0
-            },
-            "trait": {
-                True: 0,
-                False: 0
-            }
-        }
-        for person in people
-    }
+# Inference modes selectable from the command line
+MODES = ("exact", "gibbs", "likelihood")
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
+# Defaults for approximate inference
+TARGET_SE = 0.005
+TIME_BUDGET = 10.0
+BURN_IN = 100
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+# Samples (or Gibbs sweeps) drawn between convergence checks
+SAMPLE_BATCH = 100
+MIN_BATCHES = 10
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+def main():
 
-    # Ensure probabilities sum to 1
-    normalize(probabilities)
+    # Check for proper usage
+    if len(sys.argv) not in (2, 3) or (
+        len(sys.argv) == 3 and sys.argv[2] not in MODES
+    ):
+        sys.exit("Usage: python heredity.py data.csv [exact|gibbs|likelihood]")
+    people = load_data(sys.argv[1])
+    mode = sys.argv[2] if len(sys.argv) == 3 else "exact"
+
+    diagnostics = dict()
+    if mode == "exact":
+        # Solve each independent family separately
+        probabilities = family_probabilities(people)
+    else:
+        probabilities, diagnostics = approximate_probabilities(
+            people, method=mode, chains=os.cpu_count() or 1
+        )
 
     # Print results
     for person in people:
@@ -93,6 +89,10 @@ def main():
                 p = probabilities[person][field][value]
                 print(f"    {value}: {p:.4f}")
 
+    # Report convergence of approximate inference
+    for key, value in diagnostics.items():
+        print(f"{key}: {value}")
+
 
 def load_data(filename):
     """
@@ -116,19 +116,294 @@ def load_data(filename):
     return data
 
 
-def powerset(s):
+def families(people):
     """
-    Return a list of all possible subsets of set s.
+    Split `people` into independent families.
+    Two people belong to the same family if they are connected through
+    any chain of mother/father links. Returns a list of dictionaries in
+    the same format as `people`, one per family, in order of first
+    appearance.
     """
-    s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
+    # Union-find over parent links
+    root = {person: person for person in people}
+
+    def find(person):
+        while root[person] != person:
+            root[person] = root[root[person]]
+            person = root[person]
+        return person
+
+    for person in people:
+        for parent in (people[person]["mother"], people[person]["father"]):
+            if parent is not None:
+                root[find(parent)] = find(person)
+
+    components = dict()
+    for person in people:
+        components.setdefault(find(person), dict())[person] = people[person]
+    return list(components.values())
+
+
+def infer(people):
+    """
+    Compute gene and trait distributions for everyone in `people` by
+    exact enumeration. `people` should be a single family, as every
+    member multiplies the size of the space that is enumerated.
+    Sets of people are represented as integer bitmasks, with bit i set
+    if the i-th person of `people` is in the set.
+    """
+    tables = probability_tables()
+    gene_table, inherit, trait_table = (
+        tables["gene"], tables["inherit"], tables["trait"]
+    )
+    names = list(people)
+    index = {person: i for i, person in enumerate(names)}
+    parents = [
+        None if people[person]["mother"] is None else
+        (index[people[person]["mother"]], index[people[person]["father"]])
+        for person in names
     ]
+    everyone = (1 << len(names)) - 1
+
+    # Only sets of people with the trait that agree with the evidence
+    known_trait = unknown_trait = 0
+    for i, person in enumerate(names):
+        if people[person]["trait"] is None:
+            unknown_trait |= 1 << i
+        elif people[person]["trait"]:
+            known_trait |= 1 << i
+    trait_sets = [known_trait | subset for subset in submasks(unknown_trait)]
+
+    # Keep track of unnormalized gene and trait probabilities per person
+    gene_sums = [[0, 0, 0] for _ in names]
+    trait_sums = [[0, 0] for _ in names]
+
+    # Loop over all sets of people who might have the gene
+    for one_gene in submasks(everyone):
+        for two_genes in submasks(everyone & ~one_gene):
+            genes = [
+                1 if one_gene >> i & 1 else 2 if two_genes >> i & 1 else 0
+                for i in range(len(names))
+            ]
+            gene_p = 1
+            for i, pair in enumerate(parents):
+                gene_p *= (gene_table[genes[i]] if pair is None else
+                           inherit[genes[pair[0]]][genes[pair[1]]][genes[i]])
+
+            for have_trait in trait_sets:
+                p = gene_p
+                for i, g in enumerate(genes):
+                    p *= trait_table[g][have_trait >> i & 1]
+                for i, g in enumerate(genes):
+                    gene_sums[i][g] += p
+                    trait_sums[i][have_trait >> i & 1] += p
+
+    probabilities = {
+        person: {
+            "gene": {g: gene_sums[i][g] for g in (2, 1, 0)},
+            "trait": {True: trait_sums[i][1], False: trait_sums[i][0]}
+        }
+        for i, person in enumerate(names)
+    }
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+    return probabilities
+
+
+def family_probabilities(people, processes=None):
+    """
+    Compute gene and trait distributions for everyone in `people`.
+    Independent families are enumerated separately, across `processes`
+    worker processes when there are at least PARALLEL_FAMILIES of them
+    and `processes` is not 1, and their results merged in the order of
+    `people`.
+    """
+    components = families(people)
+    if len(components) >= PARALLEL_FAMILIES and processes != 1:
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(infer, components))
+    else:
+        results = [infer(component) for component in components]
+
+    probabilities = dict()
+    for result in results:
+        probabilities.update(result)
+    return {person: probabilities[person] for person in people}
 
 
-def joint_probability(people, one_gene, two_genes, have_trait):
+class InferenceSession():
+    """
+    Exact inference over a pedigree that is loaded once and then queried
+    as trait evidence arrives one person at a time.
+    """
+
+    def __init__(self, people):
+        """
+        Enumerate the gene assignments of every family in `people` once,
+        caching the probability of each assignment under PROBS.
+        """
+        self.people = {person: dict(people[person]) for person in people}
+        self.tables = probability_tables()
+        self.families = []
+        self.family = dict()
+        for component in families(self.people):
+            for person in component:
+                self.family[person] = len(self.families)
+            self.families.append(self.enumerate_genes(list(component)))
+
+    def enumerate_genes(self, names):
+        """
+        Return the cached factors of one family: its gene assignments,
+        their prior probabilities, their weights given the current trait
+        evidence, and the trait likelihood currently applied per person.
+        """
+        gene_table, inherit = self.tables["gene"], self.tables["inherit"]
+        index = {person: i for i, person in enumerate(names)}
+        parents = [
+            None if self.people[person]["mother"] is None else
+            (index[self.people[person]["mother"]],
+             index[self.people[person]["father"]])
+            for person in names
+        ]
+        everyone = (1 << len(names)) - 1
+
+        assignments = []
+        priors = []
+        for one_gene in submasks(everyone):
+            for two_genes in submasks(everyone & ~one_gene):
+                genes = tuple(
+                    1 if one_gene >> i & 1 else 2 if two_genes >> i & 1 else 0
+                    for i in range(len(names))
+                )
+                p = 1
+                for i, pair in enumerate(parents):
+                    p *= (gene_table[genes[i]] if pair is None else
+                          inherit[genes[pair[0]]][genes[pair[1]]][genes[i]])
+                assignments.append(genes)
+                priors.append(p)
+
+        family = {
+            "names": names,
+            "index": index,
+            "assignments": assignments,
+            "priors": priors,
+            "likelihoods": [(1, 1, 1)] * len(names),
+            "weights": list(priors),
+            "marginals": None
+        }
+        for person in names:
+            self.apply_evidence(family, person)
+        return family
+
+    def likelihood(self, person):
+        """
+        Return the likelihood of `person`'s trait evidence for each gene
+        count, or 1 for each if their trait is unknown.
+        """
+        trait = self.people[person]["trait"]
+        if trait is None:
+            return (1, 1, 1)
+        return tuple(self.tables["trait"][g][trait] for g in range(3))
+
+    def apply_evidence(self, family, person):
+        """
+        Rescale the weights of `family` for a change in `person`'s trait
+        evidence. Only the factor belonging to `person` is replaced; the
+        weights are rebuilt from the priors if the old factor was zero.
+        """
+        i = family["index"][person]
+        old = family["likelihoods"][i]
+        new = self.likelihood(person)
+        if old == new:
+            return
+        family["likelihoods"][i] = new
+        family["marginals"] = None
+
+        weights = family["weights"]
+        if all(old):
+            ratio = [new[g] / old[g] for g in range(3)]
+            for a, genes in enumerate(family["assignments"]):
+                weights[a] *= ratio[genes[i]]
+        else:
+            for a, genes in enumerate(family["assignments"]):
+                p = family["priors"][a]
+                for j, likelihood in enumerate(family["likelihoods"]):
+                    p *= likelihood[genes[j]]
+                weights[a] = p
+
+    def set_trait(self, person, trait):
+        """
+        Set `person`'s trait evidence to True, False or None (unknown)
+        and return the updated gene and trait distributions.
+        """
+        self.people[person]["trait"] = trait
+        self.apply_evidence(self.families[self.family[person]], person)
+        return self.probabilities()
+
+    def clear_trait(self, person):
+        """
+        Forget `person`'s trait evidence and return the updated
+        distributions.
+        """
+        return self.set_trait(person, None)
+
+    def family_marginals(self, family):
+        """
+        Compute, and cache, the normalized distributions of one family.
+        """
+        if family["marginals"] is None:
+            names = family["names"]
+            trait_table = self.tables["trait"]
+            evidence = [self.people[person]["trait"] for person in names]
+            gene_sums = [[0, 0, 0] for _ in names]
+            trait_sums = [0] * len(names)
+            for genes, weight in zip(family["assignments"], family["weights"]):
+                for i, g in enumerate(genes):
+                    gene_sums[i][g] += weight
+                    trait_sums[i] += weight * (
+                        trait_table[g][True] if evidence[i] is None else
+                        evidence[i]
+                    )
+            total = sum(family["weights"])
+            family["marginals"] = {
+                person: {
+                    "gene": {g: gene_sums[i][g] / total for g in (2, 1, 0)},
+                    "trait": {
+                        True: trait_sums[i] / total,
+                        False: 1 - trait_sums[i] / total
+                    }
+                }
+                for i, person in enumerate(names)
+            }
+        return family["marginals"]
+
+    def probabilities(self):
+        """
+        Return gene and trait distributions for everyone, in the format
+        of `family_probabilities`, recomputing only families whose
+        evidence changed since the last call.
+        """
+        probabilities = dict()
+        for family in self.families:
+            probabilities.update(self.family_marginals(family))
+        return {person: probabilities[person] for person in self.people}
+
+
+def submasks(mask):
+    """
+    Lazily yield every subset of the bits set in `mask`, from the full
+    set down to the empty set.
+    """
+    subset = mask
+    while True:
+        yield subset
+        if not subset:
+            return
+        subset = (subset - 1) & mask
+
+
+def joint_probability(people, one_gene, two_genes, have_trait, tables=None):
     """
     Compute and return a joint probability.
 
@@ -138,57 +413,94 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone not in `one_gene` or `two_gene` does not have the gene, and
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
+
+    `tables` are the compiled tables of `probability_tables`, looked up
+    from PROBS if not given.
     """
+    if tables is None:
+        tables = probability_tables()
+    gene_table, inherit, trait_table = (
+        tables["gene"], tables["inherit"], tables["trait"]
+    )
+
+    def gene_count(person):
+        return 1 if person in one_gene else 2 if person in two_genes else 0
+
     joint_prob = 1
 
     for person in people:
-        # determine gene count
-        if person in one_gene:
-            gene_count = 1
-        elif person in two_genes:
-            gene_count = 2
-        else:
-            gene_count = 0
+        genes = gene_count(person)
 
         # if no parents use unconditional probability of gene
-        if not bool(people[person]["mother"]):
-            joint_prob *= base_gene_probability(gene_count)
+        mother = people[person]["mother"]
+        if not bool(mother):
+            joint_prob *= gene_table[genes]
 
+        # otherwise probabilities depend on parent genes
         else:
-            # probabilities will depend on parent genes
-            mother = people[person]["mother"]
             father = people[person]["father"]
-
-            gene_contributions = {
-                parent: (
-                    1 - PROBS["mutation"] if parent in two_genes else
-                    0.5 if parent in one_gene else
-                    PROBS["mutation"]
-                )
-                for parent in (mother, father)
-            }
-
-            if gene_count == 2:
-                joint_prob *= gene_contributions[mother] * gene_contributions[father]
-            elif gene_count == 1:
-                joint_prob *= gene_contributions[mother] * (1 - gene_contributions[father]) + \
-                              (1 - gene_contributions[mother]) * gene_contributions[father]
-            elif gene_count == 0:
-                joint_prob *= (1 - gene_contributions[mother]) * (1 - gene_contributions[father])
+            joint_prob *= inherit[gene_count(mother)][gene_count(father)][genes]
 
         # Calculate trait probability conditional on gene presence
-        has_trait = person in have_trait
-        joint_prob *= conditional_trait_probability(gene_count, has_trait)
+        joint_prob *= trait_table[genes][person in have_trait]
 
     return joint_prob
 
 
+def probability_tables(probs=None):
+    """
+    Return conditional probability tables for `probs` (PROBS by default),
+    indexed by gene count:
+        * `gene[g]`: probability of g copies for someone without parents
+        * `inherit[mother][father][g]`: probability of g copies given
+          the gene counts of both parents
+        * `trait[g][t]`: probability of trait presence t given g copies
+    Tables are compiled once per distinct configuration, so changes to
+    `probs` are picked up on the next call.
+    """
+    if probs is None:
+        probs = PROBS
+    key = fingerprint(probs)
+    if key not in COMPILED_TABLES:
+        # Probability that a parent with g copies passes the gene on
+        passing = [probs["mutation"], 0.5, 1 - probs["mutation"]]
+        COMPILED_TABLES[key] = {
+            "gene": tuple(probs["gene"][g] for g in range(3)),
+            "inherit": tuple(
+                tuple(
+                    ((1 - m) * (1 - f), m * (1 - f) + (1 - m) * f, m * f)
+                    for f in passing
+                )
+                for m in passing
+            ),
+            "trait": tuple(
+                (probs["trait"][g][False], probs["trait"][g][True])
+                for g in range(3)
+            )
+        }
+    return COMPILED_TABLES[key]
+
+
+def fingerprint(probs):
+    """
+    Return every probability in `probs` as a flat tuple: a key that is
+    cheap to build on each call, yet changes whenever `probs` is edited.
+    """
+    gene = probs["gene"]
+    trait = probs["trait"]
+    return (
+        probs["mutation"], gene[0], gene[1], gene[2],
+        trait[0][False], trait[0][True], trait[1][False], trait[1][True],
+        trait[2][False], trait[2][True]
+    )
+
+
 def base_gene_probability(gene_count):
-    return PROBS["gene"][gene_count]
+    return probability_tables()["gene"][gene_count]
 
 
 def conditional_trait_probability(gene_count, trait_presence):
-    return PROBS["trait"][gene_count][trait_presence]
+    return probability_tables()["trait"][gene_count][trait_presence]
 
 
 def update(probabilities, one_gene, two_genes, have_trait, p):
@@ -225,5 +537,321 @@ def normalize(probabilities):
                 probabilities[person][category][value] /= probabilities_sum
 
 
+def pedigree(people):
+    """
+    Index `people` for sampling.
+    Returns a dictionary with the list of `names` ordered so that parents
+    precede their children, and parallel lists of `parents` (a pair of
+    indices, or None for founders), `children` (pairs of child index and
+    whether this person is the child's mother) and `trait` evidence.
+    """
+    # Kahn's algorithm over mother/father links
+    waiting = {
+        person: sum(people[person][parent] is not None
+                    for parent in ("mother", "father"))
+        for person in people
+    }
+    offspring = {person: [] for person in people}
+    for person in people:
+        for parent in ("mother", "father"):
+            if people[person][parent] is not None:
+                offspring[people[person][parent]].append(person)
+
+    names = [person for person in people if not waiting[person]]
+    for person in names:
+        for child in offspring[person]:
+            waiting[child] -= 1
+            if not waiting[child]:
+                names.append(child)
+    if len(names) != len(people):
+        raise ValueError("pedigree contains a cycle")
+
+    index = {person: i for i, person in enumerate(names)}
+    parents = [
+        None if people[person]["mother"] is None else
+        (index[people[person]["mother"]], index[people[person]["father"]])
+        for person in names
+    ]
+    children = [[] for _ in names]
+    for i, pair in enumerate(parents):
+        if pair is not None:
+            children[pair[0]].append((i, True))
+            children[pair[1]].append((i, False))
+
+    return {
+        "names": names,
+        "parents": parents,
+        "children": children,
+        "trait": [people[person]["trait"] for person in names]
+    }
+
+
+def sample_gene(rng, distribution):
+    """
+    Draw a gene count from a distribution over 0, 1 and 2 copies.
+    """
+    r = rng.random() * sum(distribution)
+    if r < distribution[0]:
+        return 0
+    if r < distribution[0] + distribution[1]:
+        return 1
+    return 2
+
+
+def likelihood_chain(network, tables, target_se, time_budget, seed):
+    """
+    Run likelihood weighting until the largest standard error of any
+    marginal drops to `target_se` or `time_budget` seconds have passed.
+    Genes are sampled forward from the prior, and each sample is weighted
+    by the likelihood of the observed traits.
+    Returns weighted sums of gene counts and trait probabilities.
+    """
+    rng = random.Random(seed)
+    parents, evidence = network["parents"], network["trait"]
+    gene_table, inherit, trait_table = (
+        tables["gene"], tables["inherit"], tables["trait"]
+    )
+    n = len(parents)
+    genes = [0] * n
+    gene_sums = [[0.0, 0.0, 0.0] for _ in range(n)]
+    trait_sums = [0.0] * n
+    total = squares = 0.0
+    samples = 0
+    deadline = time.monotonic() + time_budget
+
+    while True:
+        for _ in range(SAMPLE_BATCH):
+            weight = 1.0
+            for i in range(n):
+                pair = parents[i]
+                distribution = (
+                    gene_table if pair is None else
+                    inherit[genes[pair[0]]][genes[pair[1]]]
+                )
+                genes[i] = sample_gene(rng, distribution)
+                if evidence[i] is not None:
+                    weight *= trait_table[genes[i]][evidence[i]]
+            if weight:
+                total += weight
+                squares += weight * weight
+                for i in range(n):
+                    gene_sums[i][genes[i]] += weight
+                    # Unobserved traits are averaged rather than sampled
+                    trait_sums[i] += weight * (
+                        trait_table[genes[i]][True] if evidence[i] is None else
+                        evidence[i]
+                    )
+        samples += SAMPLE_BATCH
+
+        result = {
+            "samples": samples,
+            "weight": total,
+            "squares": squares,
+            "genes": gene_sums,
+            "traits": trait_sums
+        }
+        if (likelihood_error(result) <= target_se
+                or time.monotonic() >= deadline):
+            return result
+
+
+def likelihood_error(result):
+    """
+    Return the largest standard error of any marginal estimated by
+    likelihood weighting, using the effective sample size of the weights.
+    """
+    if not result["weight"]:
+        return math.inf
+    effective = result["weight"] ** 2 / result["squares"]
+    largest = 0
+    for sums, trait in zip(result["genes"], result["traits"]):
+        for value in sums + [trait]:
+            p = min(max(value / result["weight"], 0), 1)
+            largest = max(largest, math.sqrt(p * (1 - p) / effective))
+    return largest
+
+
+def gibbs_chain(network, tables, target_se, time_budget, seed):
+    """
+    Run a Gibbs sampler over everyone's gene count until the largest
+    batch-means standard error of any marginal drops to `target_se` or
+    `time_budget` seconds have passed.
+    Each person is resampled from their distribution given their parents,
+    their children and their own trait; that distribution (rather than
+    the sampled value) is accumulated. Returns the mean of every marginal
+    over each batch of SAMPLE_BATCH sweeps after burn-in.
+    """
+    rng = random.Random(seed)
+    parents, children, evidence = (
+        network["parents"], network["children"], network["trait"]
+    )
+    gene_table, inherit, trait_table = (
+        tables["gene"], tables["inherit"], tables["trait"]
+    )
+    n = len(parents)
+    deadline = time.monotonic() + time_budget
+
+    # Start from a forward sample of the prior
+    genes = [0] * n
+    for i in range(n):
+        pair = parents[i]
+        genes[i] = sample_gene(rng, gene_table if pair is None else
+                               inherit[genes[pair[0]]][genes[pair[1]]])
+
+    batches = []
+    sweeps = 0
+    while True:
+        sums = [0.0] * (4 * n)
+        for _ in range(SAMPLE_BATCH):
+            for i in range(n):
+                pair = parents[i]
+                if pair is None:
+                    conditional = list(gene_table)
+                else:
+                    conditional = list(inherit[genes[pair[0]]][genes[pair[1]]])
+                for g in range(3):
+                    if evidence[i] is not None:
+                        conditional[g] *= trait_table[g][evidence[i]]
+                    for child, is_mother in children[i]:
+                        other = parents[child][1 if is_mother else 0]
+                        table = (inherit[g][genes[other]] if is_mother else
+                                 inherit[genes[other]][g])
+                        conditional[g] *= table[genes[child]]
+                norm = sum(conditional)
+                if not norm:
+                    continue
+                genes[i] = sample_gene(rng, conditional)
+                for g in range(3):
+                    sums[4 * i + g] += conditional[g] / norm
+                sums[4 * i + 3] += (
+                    sum(conditional[g] * trait_table[g][True]
+                        for g in range(3)) / norm
+                    if evidence[i] is None else evidence[i]
+                )
+        sweeps += SAMPLE_BATCH
+        if sweeps > BURN_IN:
+            batches.append([value / SAMPLE_BATCH for value in sums])
+
+        # Always keep at least one batch, even past the time budget
+        if batches and (time.monotonic() >= deadline or (
+            len(batches) >= MIN_BATCHES and gibbs_error(batches) <= target_se
+        )):
+            return {"samples": sweeps, "batches": batches}
+
+
+def gibbs_error(batches):
+    """
+    Return the largest batch-means standard error of any marginal.
+    """
+    if len(batches) < 2:
+        return math.inf
+    return max(
+        statistics.stdev(column) / math.sqrt(len(batches))
+        for column in zip(*batches)
+    )
+
+
+def potential_scale_reduction(chains):
+    """
+    Return the largest Gelman-Rubin statistic of any marginal across
+    Gibbs chains, each a list of batch means, truncated to equal length.
+    Values close to 1 indicate that the chains have mixed.
+    """
+    length = min(len(batches) for batches in chains)
+    if len(chains) < 2 or length < 2:
+        return None
+    largest = 1.0
+    for columns in zip(*(zip(*batches[:length]) for batches in chains)):
+        means = [statistics.fmean(column) for column in columns]
+        within = statistics.fmean(
+            statistics.variance(column) for column in columns
+        )
+        between = length * statistics.variance(means)
+        if within:
+            pooled = (length - 1) / length * within + between / length
+            largest = max(largest, math.sqrt(pooled / within))
+    return largest
+
+
+def approximate_probabilities(people, method="gibbs", target_se=TARGET_SE,
+                              time_budget=TIME_BUDGET, chains=1, seed=None):
+    """
+    Estimate gene and trait distributions for everyone in `people` by
+    Gibbs sampling (`method` "gibbs") or likelihood weighting
+    ("likelihood").
+    Sampling stops once the largest standard error of any marginal is at
+    most `target_se`, or after `time_budget` seconds. Independent `chains`
+    run in parallel processes and are pooled.
+    Returns the distributions, in the same format as `family_probabilities`,
+    and a dictionary of convergence diagnostics.
+    """
+    chain = {"gibbs": gibbs_chain, "likelihood": likelihood_chain}[method]
+    network = pedigree(people)
+    tables = probability_tables()
+    rng = random.Random(seed)
+    seeds = [rng.randrange(2 ** 32) for _ in range(chains)]
+
+    # Pooling k chains divides the standard error by roughly sqrt(k)
+    chain_se = target_se * math.sqrt(chains)
+    start = time.monotonic()
+    if chains > 1:
+        with ProcessPoolExecutor(chains) as executor:
+            results = list(executor.map(
+                chain, [network] * chains, [tables] * chains,
+                [chain_se] * chains, [time_budget] * chains, seeds
+            ))
+    else:
+        results = [chain(network, tables, chain_se, time_budget, seeds[0])]
+    elapsed = time.monotonic() - start
+
+    n = len(network["names"])
+    if method == "gibbs":
+        batches = [batch for result in results for batch in result["batches"]]
+        means = [statistics.fmean(column) for column in zip(*batches)]
+        error = gibbs_error(batches)
+        diagnostics = {
+            "r_hat": potential_scale_reduction(
+                [result["batches"] for result in results]
+            )
+        }
+    else:
+        pooled = {
+            "weight": sum(result["weight"] for result in results),
+            "squares": sum(result["squares"] for result in results),
+            "genes": [
+                [sum(result["genes"][i][g] for result in results)
+                 for g in range(3)]
+                for i in range(n)
+            ],
+            "traits": [
+                sum(result["traits"][i] for result in results)
+                for i in range(n)
+            ]
+        }
+        means = []
+        for i in range(n):
+            means.extend(value / pooled["weight"] for value in
+                         pooled["genes"][i] + [pooled["traits"][i]])
+        error = likelihood_error(pooled)
+        diagnostics = {
+            "effective_samples": pooled["weight"] ** 2 / pooled["squares"]
+        }
+
+    probabilities = dict()
+    for i, person in enumerate(network["names"]):
+        probabilities[person] = {
+            "gene": {g: means[4 * i + g] for g in (2, 1, 0)},
+            "trait": {True: means[4 * i + 3], False: 1 - means[4 * i + 3]}
+        }
+    diagnostics.update({
+        "samples": sum(result["samples"] for result in results),
+        "chains": chains,
+        "standard_error": error,
+        "converged": error <= target_se,
+        "elapsed": elapsed
+    })
+    return {person: probabilities[person] for person in people}, diagnostics
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,243 @@
+from logic import (And, Biconditional, Constant, Implication, Not, Or, Symbol,
+                   simplify)
+
+# Node ids of the two terminals
+FALSE = 0
+TRUE = 1
+
+
+class BDD():
+    """
+    Reduced ordered binary decision diagram manager.
+
+    Nodes are integer ids. Each internal node tests the symbol at its
+    level, with a `low` child for false and a `high` child for true, and
+    every node is unique, so equivalent functions are the same id.
+    Symbols not in the initial order are appended below the others.
+    """
+
+    def __init__(self, order=()):
+        self.order = []
+        self.levels = dict()
+        self.nodes = [None, None]
+        self.unique = dict()
+        self.computed = dict()
+        for name in order:
+            self.level(name)
+
+    def level(self, name):
+        """Returns the level of a symbol, adding it at the bottom if new."""
+        if name not in self.levels:
+            self.levels[name] = len(self.order)
+            self.order.append(name)
+        return self.levels[name]
+
+    def top(self, u):
+        """Returns the level tested by a node; terminals are below all."""
+        return self.nodes[u][0] if u > TRUE else float("inf")
+
+    def node(self, level, low, high):
+        """Returns the unique node for a test, skipping redundant ones."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        if key not in self.unique:
+            self.unique[key] = len(self.nodes)
+            self.nodes.append(key)
+        return self.unique[key]
+
+    def var(self, name):
+        """Returns the node that is true exactly when the symbol is."""
+        return self.node(self.level(name), FALSE, TRUE)
+
+    def apply(self, operator, u, v):
+        """
+        Combines two nodes with a binary boolean `operator`, one of
+        "and", "or", "xor", "implies" or "iff".
+        """
+        if u <= TRUE and v <= TRUE:
+            return int(OPERATORS[operator](bool(u), bool(v)))
+        key = (operator, u, v)
+        if key not in self.computed:
+            level = min(self.top(u), self.top(v))
+            u_low, u_high = self.cofactors(u, level)
+            v_low, v_high = self.cofactors(v, level)
+            self.computed[key] = self.node(
+                level,
+                self.apply(operator, u_low, v_low),
+                self.apply(operator, u_high, v_high)
+            )
+        return self.computed[key]
+
+    def cofactors(self, u, level):
+        """Returns the children of a node for a test at `level`."""
+        if self.top(u) == level:
+            return self.nodes[u][1], self.nodes[u][2]
+        return u, u
+
+    def negate(self, u):
+        """Returns the node for the negation of a node."""
+        return self.apply("xor", u, TRUE)
+
+    def compile(self, sentence):
+        """Returns the node for a logical sentence."""
+        if isinstance(sentence, Symbol):
+            return self.var(sentence.name)
+        if isinstance(sentence, Constant):
+            return TRUE if sentence.value else FALSE
+        if isinstance(sentence, Not):
+            return self.negate(self.compile(sentence.operand))
+        if isinstance(sentence, (And, Or)):
+            operator, result = (("and", TRUE) if isinstance(sentence, And)
+                                else ("or", FALSE))
+            for operand in sentence.children():
+                result = self.apply(operator, result, self.compile(operand))
+            return result
+        if isinstance(sentence, Implication):
+            return self.apply("implies", self.compile(sentence.antecedent),
+                              self.compile(sentence.consequent))
+        if isinstance(sentence, Biconditional):
+            return self.apply("iff", self.compile(sentence.left),
+                              self.compile(sentence.right))
+        raise TypeError("must be a logical sentence")
+
+    def count(self, u):
+        """
+        Returns the number of assignments to all symbols in the order
+        that satisfy a node, in time linear in the size of the node.
+        """
+        counts = {FALSE: 0, TRUE: 1}
+
+        def paths(u):
+            """Counts assignments to the symbols from u's level down."""
+            if u not in counts:
+                level, low, high = self.nodes[u]
+                counts[u] = sum(
+                    paths(child) * 2 ** (min(self.top(child),
+                                             len(self.order)) - level - 1)
+                    for child in (low, high)
+                )
+            return counts[u]
+
+        return paths(u) * 2 ** min(self.top(u), len(self.order))
+
+    def models(self, u, depth=None):
+        """
+        Yields every assignment to the first `depth` symbols in the order
+        (by default, all of them) that satisfies a node, as a dictionary.
+        The node must not test any symbol below `depth`.
+        """
+        if depth is None:
+            depth = len(self.order)
+
+        def expand(u, level, model):
+            if u == FALSE:
+                return
+            if level == depth:
+                yield dict(model)
+                return
+            name = self.order[level]
+            for value in (False, True):
+                model[name] = value
+                if self.top(u) == level:
+                    child = self.nodes[u][2 if value else 1]
+                else:
+                    child = u
+                yield from expand(child, level + 1, model)
+            del model[name]
+
+        yield from expand(u, 0, dict())
+
+
+OPERATORS = {
+    "and": lambda a, b: a and b,
+    "or": lambda a, b: a or b,
+    "xor": lambda a, b: a != b,
+    "implies": lambda a, b: (not a) or b,
+    "iff": lambda a, b: a == b
+}
+
+
+def symbol_order(sentence):
+    """
+    Returns an order for the symbols of a sentence that keeps symbols
+    which appear together close together: starting from the most common
+    symbol, repeatedly pick the symbol sharing the most conjuncts with
+    those already placed.
+    """
+    conjuncts = (sentence.conjuncts if isinstance(sentence, And)
+                 else [sentence])
+    groups = [conjunct.symbols() for conjunct in conjuncts]
+    frequency = dict()
+    for group in groups:
+        for name in group:
+            frequency[name] = frequency.get(name, 0) + 1
+
+    order = []
+    placed = set()
+    while len(order) < len(frequency):
+        affinity = {name: 0 for name in frequency if name not in placed}
+        for group in groups:
+            if group & placed:
+                for name in group - placed:
+                    affinity[name] += 1
+        name = max(affinity,
+                   key=lambda name: (affinity[name], frequency[name], name))
+        order.append(name)
+        placed.add(name)
+    return order
+
+
+class CompiledKnowledge():
+    """
+    Knowledge base compiled once into a BDD, so that it can be queried
+    repeatedly, and its models counted or listed, in time linear in the
+    size of the diagram.
+    """
+
+    def __init__(self, knowledge, order=None):
+        # Symbols that simplifying removes are still free in the models
+        symbols = knowledge.symbols()
+        knowledge = simplify(knowledge)
+        if order is None:
+            order = symbol_order(knowledge)
+        self.bdd = BDD(order)
+        for name in sorted(symbols):
+            self.bdd.level(name)
+        self.root = self.bdd.compile(knowledge)
+
+        # Symbols of later queries are placed below these
+        self.depth = len(self.bdd.order)
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        query = self.bdd.compile(simplify(query))
+        return self.bdd.apply("implies", self.root, query) == TRUE
+
+    def count_models(self):
+        """
+        Returns the number of models of the knowledge base, over all of
+        its symbols.
+        """
+        extra = len(self.bdd.order) - self.depth
+        return self.bdd.count(self.root) // 2 ** extra
+
+    def models(self):
+        """Yields every model of the knowledge base, as counted above."""
+        yield from self.bdd.models(self.root, self.depth)
+
+    def size(self):
+        """Returns the number of nodes reachable from the root."""
+        reachable = set()
+        stack = [self.root]
+        while stack:
+            u = stack.pop()
+            if u > TRUE and u not in reachable:
+                reachable.add(u)
+                stack.extend(self.bdd.nodes[u][1:])
+        return len(reachable) + 2
+
+
+def bdd_check(knowledge, query):
+    """Checks if knowledge base entails query, by compiling it to a BDD."""
+    return CompiledKnowledge(knowledge).entails(query)
@@ -0,0 +1,132 @@
+import sys
+import time
+
+from bdd import CompiledKnowledge
+from generate import knights_puzzle, random_ksat
+from logic import *
+
+# Problem sizes: inhabitants per knights puzzle, variables per 3-SAT formula
+SIZES = {
+    "knights": [2, 3, 4, 6, 8, 10, 12, 16, 24, 32, 48, 64],
+    "3-sat": [5, 8, 10, 12, 15, 18, 20, 25, 30, 40, 60, 80, 100]
+}
+
+# A backend is not run on larger sizes once one run takes this long
+TIME_LIMIT = 5.0
+
+# Largest number of symbols handed to truth-table backends, beyond which
+# model_check hands over to sat_check
+TRUTH_TABLE_SYMBOLS = BITWISE_SYMBOLS
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [seed]")
+    seed = int(sys.argv[1]) if len(sys.argv) == 2 else 0
+
+    for family, generate in (("knights", knights_puzzle),
+                             ("3-sat", random_ksat)):
+        print(f"{family}: seconds to answer every symbol as a query")
+        times = run_family(SIZES[family], generate, seed)
+        print()
+        for line in crossovers(times):
+            print(f"  {line}")
+        print()
+
+
+def backends():
+    """
+    Returns (name, function) pairs for every entailment backend. Each
+    function takes a knowledge base and a list of queries and returns
+    whether each query is entailed.
+    """
+    def single(check):
+        return lambda knowledge, queries: [
+            check(knowledge, query) for query in queries
+        ]
+
+    def compiled(knowledge, queries):
+        knowledge = CompiledKnowledge(knowledge)
+        return [knowledge.entails(query) for query in queries]
+
+    def incremental(knowledge, queries):
+        entailed = KnowledgeBase(knowledge).ask_all(queries)
+        return [entailed[query] for query in queries]
+
+    def all_at_once(knowledge, queries):
+        entailed = model_check_all(knowledge, queries)
+        return [entailed[query] for query in queries]
+
+    return [
+        ("model_check", single(model_check)),
+        ("parallel", single(parallel_model_check)),
+        ("sat_check", single(sat_check)),
+        ("bdd", compiled),
+        ("kb", incremental),
+        ("check_all", all_at_once)
+    ]
+
+
+def run_family(sizes, generate, seed):
+    """
+    Times every backend on generated problems of increasing size, and
+    checks that all backends agree.
+    Returns a dictionary from backend name to a dictionary of times by
+    size.
+    """
+    names = [name for name, _ in backends()]
+    print(f"  {'size':>5} {'symbols':>7} " +
+          " ".join(f"{name:>11}" for name in names))
+
+    times = {name: dict() for name in names}
+    stopped = set()
+    for size in sizes:
+        knowledge, symbols = generate(size, seed=seed)
+        row = []
+        expected = None
+        for name, run in backends():
+            too_large = (name in ("model_check", "parallel")
+                         and len(symbols) > TRUTH_TABLE_SYMBOLS)
+            if name in stopped or too_large:
+                row.append(f"{'-':>11}")
+                continue
+
+            start = time.perf_counter()
+            entailed = run(knowledge, symbols)
+            seconds = time.perf_counter() - start
+
+            if expected is None:
+                expected = entailed
+            elif entailed != expected:
+                sys.exit(f"{name} disagrees at size {size}")
+            times[name][size] = seconds
+            row.append(f"{seconds:>11.4f}")
+            if seconds > TIME_LIMIT:
+                stopped.add(name)
+        print(f"  {size:>5} {len(symbols):>7} " + " ".join(row), flush=True)
+    return times
+
+
+def crossovers(times):
+    """
+    Yields a description of each size at which one backend overtakes
+    another, comparing only sizes that both completed.
+    """
+    names = list(times)
+    for i, first in enumerate(names):
+        for second in names[i + 1:]:
+            sizes = sorted(times[first].keys() & times[second].keys())
+            faster = None
+            for size in sizes:
+                winner = (first if times[first][size] <= times[second][size]
+                          else second)
+                if faster is not None and winner != faster:
+                    loser = second if winner == first else first
+                    yield f"{winner} overtakes {loser} at size {size}"
+                faster = winner
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import random
+import sys
+
+from logic import *
+
+# Clauses per variable at which random 3-SAT is hardest
+PHASE_TRANSITION = 4.26
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) not in (3, 4) or sys.argv[1] not in ("knights", "sat"):
+        sys.exit("Usage: python generate.py knights|sat size [seed]")
+    size = int(sys.argv[2])
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    if sys.argv[1] == "knights":
+        knowledge, symbols = knights_puzzle(size, seed)
+    else:
+        knowledge, symbols = random_ksat(size, seed=seed)
+    compiler = Tseitin()
+    compiler.add(knowledge)
+    print(compiler.dimacs(), end="")
+
+
+def knights_puzzle(inhabitants, seed=None):
+    """
+    Generates a knights and knaves puzzle with `inhabitants` people, who
+    each make one statement about others. Statements are chosen to be
+    consistent with a hidden random assignment of knights and knaves.
+    Returns the knowledge base and the list of its symbols.
+    """
+    rng = random.Random(seed)
+    names = [f"P{index}" for index in range(inhabitants)]
+    knight = [Symbol(f"{name} is a Knight") for name in names]
+    knave = [Symbol(f"{name} is a Knave") for name in names]
+    hidden = [rng.random() < 0.5 for _ in names]
+
+    knowledge = And()
+    for i in range(inhabitants):
+        # Everyone is either a knight or a knave, but not both
+        knowledge.add(Or(knight[i], knave[i]))
+        knowledge.add(Not(And(knight[i], knave[i])))
+
+    for i in range(inhabitants):
+        others = [j for j in range(inhabitants) if j != i] or [i]
+        j = rng.choice(others)
+        k = rng.choice(others)
+        claims = [
+            # "j is a knight"
+            (knight[j], hidden[j]),
+            # "j and k are the same kind"
+            (Biconditional(knight[j], knight[k]), hidden[j] == hidden[k]),
+            # "At least one of j and I is a knave"
+            (Or(knave[i], knave[j]), not hidden[i] or not hidden[j])
+        ]
+        claim, truth = rng.choice(claims)
+
+        # Knights tell the truth and knaves lie
+        if truth != hidden[i]:
+            claim = Not(claim)
+        knowledge.add(Implication(knight[i], claim))
+        knowledge.add(Implication(knave[i], Not(claim)))
+
+    return knowledge, knight + knave
+
+
+def random_ksat(variables, ratio=PHASE_TRANSITION, k=3, seed=None):
+    """
+    Generates a random k-SAT formula over `variables` symbols with
+    round(ratio * variables) clauses of k distinct literals each.
+    Returns the formula and the list of its symbols.
+    """
+    rng = random.Random(seed)
+    symbols = [Symbol(f"x{index}") for index in range(variables)]
+    formula = And()
+    for _ in range(round(ratio * variables)):
+        formula.add(Or(*(
+            symbol if rng.random() < 0.5 else Not(symbol)
+            for symbol in rng.sample(symbols, min(k, variables))
+        )))
+    return formula, symbols
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,102 @@
 import itertools
+import math
+import multiprocessing
+import os
+import weakref
+
+from sat import Solver
+
+# Largest number of symbols model_check evaluates with bitwise operations
+BITWISE_SYMBOLS = 24
+
+# Models per bitwise pass, as a power of two
+BLOCK_BITS = 16
 
 
 class Sentence():
+    """
+    Logical sentences are hash-consed: every sentence used as part of
+    another is interned, so structurally equal subformulas are the same
+    object, and their hash and symbols are computed once.
+    """
+
+    __slots__ = ("_hash", "_symbols", "_interned", "__weakref__")
+
+    # Interned sentences, keyed by class and children
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, *children):
+        """
+        Returns the interned sentence of this class with these children,
+        creating it if there is none.
+        """
+        key = (cls,) + children
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            sentence.build(*children)
+            sentence._interned = True
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def build(self, *children):
+        """Sets the children of a new sentence and caches derived data."""
+        raise Exception("nothing to build")
+
+    def children(self):
+        """Returns the children that identify the sentence."""
+        return ()
+
+    def canonical(self):
+        """Returns the interned sentence structurally equal to this one."""
+        if self._interned:
+            return self
+        return type(self).intern(*self.children())
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, Sentence) or type(self) is not type(other):
+            return False
+
+        # Distinct interned sentences are never equal
+        if self._interned and other._interned:
+            return False
+        return self._hash == other._hash and self.children() == other.children()
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self.children())
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_bits(self, bits, mask):
+        """
+        Evaluates the logical sentence in a block of models at once.
+        `bits` maps each symbol name to an integer whose bit i is the
+        symbol's value in model i, and `mask` has a bit set per model.
+        Returns the integer of the sentence's values.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self._symbols)
 
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
+        return sentence.canonical()
 
     @classmethod
     def parenthesize(cls, s):
@@ -43,15 +121,18 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return cls.intern(name)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def build(self, name):
+        self.name = name
+        self._hash = hash(("symbol", name))
+        self._symbols = frozenset({name})
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def children(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -62,23 +143,56 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_bits(self, bits, mask):
+        try:
+            return bits[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+
+class Constant(Sentence):
+    __slots__ = ("value",)
+
+    def __new__(cls, value):
+        return cls.intern(bool(value))
+
+    def build(self, value):
+        self.value = value
+        self._hash = hash(("constant", value))
+        self._symbols = frozenset()
+
+    def children(self):
+        return (self.value,)
+
+    def __repr__(self):
+        return "TRUE" if self.value else "FALSE"
+
+    def evaluate(self, model):
+        return self.value
+
+    def evaluate_bits(self, bits, mask):
+        return mask if self.value else 0
+
+    def formula(self):
+        return "⊤" if self.value else "⊥"
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        return cls.intern(Sentence.validate(operand))
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def build(self, operand):
+        self.operand = operand
+        self._hash = hash(("not", hash(operand)))
+        self._symbols = operand._symbols
+
+    def children(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,27 +200,47 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_bits(self, bits, mask):
+        return mask & ~self.operand.evaluate_bits(bits, mask)
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
-
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
-        for conjunct in conjuncts:
-            Sentence.validate(conjunct)
+    __slots__ = ("conjuncts", "_nested")
+
+    def __new__(cls, *conjuncts):
+        # Not interned, as `add` changes it in place until it is used
+        # inside another sentence
+        sentence = object.__new__(cls)
+        sentence.build(*(Sentence.validate(conjunct)
+                         for conjunct in conjuncts))
+        sentence._symbols = set(sentence._symbols)
+        sentence._interned = False
+        return sentence
+
+    def build(self, *conjuncts):
         self.conjuncts = list(conjuncts)
+        self._nested = False
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+        # Hash folded one conjunct at a time, so `add` can extend it
+        self._hash = hash("and")
+        for conjunct in conjuncts:
+            self._hash = hash((self._hash, hash(conjunct)))
+        self._symbols = frozenset().union(
+            *(conjunct._symbols for conjunct in conjuncts)
         )
 
+    def children(self):
+        return tuple(self.conjuncts)
+
+    def canonical(self):
+        # Other sentences hold the interned copy, which later additions
+        # would not reach, so none are allowed
+        self._nested = True
+        return Sentence.canonical(self)
+
     def __repr__(self):
         conjunctions = ", ".join(
             [str(conjunct) for conjunct in self.conjuncts]
@@ -114,35 +248,47 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
+        if self._interned or self._nested:
+            raise ValueError("cannot add to a sentence used in others")
+        conjunct = Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
+        self._hash = hash((self._hash, hash(conjunct)))
+        self._symbols |= conjunct._symbols
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_bits(self, bits, mask):
+        result = mask
+        for conjunct in self.conjuncts:
+            result &= conjunct.evaluate_bits(bits, mask)
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
-
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+    __slots__ = ("disjuncts",)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    def __new__(cls, *disjuncts):
+        return cls.intern(*(Sentence.validate(disjunct)
+                            for disjunct in disjuncts))
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+    def build(self, *disjuncts):
+        self.disjuncts = list(disjuncts)
+        self._hash = hash(
+            ("or", tuple(hash(disjunct) for disjunct in disjuncts))
         )
+        self._symbols = frozenset().union(
+            *(disjunct._symbols for disjunct in disjuncts)
+        )
+
+    def children(self):
+        return tuple(self.disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +297,34 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_bits(self, bits, mask):
+        result = 0
+        for disjunct in self.disjuncts:
+            result |= disjunct.evaluate_bits(bits, mask)
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
-
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
-        Sentence.validate(antecedent)
-        Sentence.validate(consequent)
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
+        return cls.intern(Sentence.validate(antecedent),
+                          Sentence.validate(consequent))
+
+    def build(self, antecedent, consequent):
         self.antecedent = antecedent
         self.consequent = consequent
+        self._hash = hash(("implies", hash(antecedent), hash(consequent)))
+        self._symbols = antecedent._symbols | consequent._symbols
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def children(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +333,30 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_bits(self, bits, mask):
+        return ((mask & ~self.antecedent.evaluate_bits(bits, mask))
+                | self.consequent.evaluate_bits(bits, mask))
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
-
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
-        Sentence.validate(left)
-        Sentence.validate(right)
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
+        return cls.intern(Sentence.validate(left), Sentence.validate(right))
+
+    def build(self, left, right):
         self.left = left
         self.right = right
+        self._hash = hash(("biconditional", hash(left), hash(right)))
+        self._symbols = left._symbols | right._symbols
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def children(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,48 +367,490 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_bits(self, bits, mask):
+        return mask & ~(self.left.evaluate_bits(bits, mask)
+                        ^ self.right.evaluate_bits(bits, mask))
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+TRUE = Constant(True)
+FALSE = Constant(False)
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+def model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query. Blocks of models are checked
+    at once when there are few enough symbols, and a SAT solver is asked
+    otherwise, as the models grow exponentially with the symbols.
+    """
 
     # Get all symbols in both knowledge and query
+    knowledge, query = simplify(knowledge), simplify(query)
     symbols = set.union(knowledge.symbols(), query.symbols())
 
+    # Check blocks of models at once when there are few enough symbols
+    if len(symbols) <= BITWISE_SYMBOLS:
+        return bitwise_check(knowledge, query, symbols)
+
     # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    return sat_check(knowledge, query)
+
+
+def truth_table_bits(count):
+    """
+    Returns, for each of `count` symbols, an integer whose bit i is that
+    symbol's value in model i of all 2 ** count models.
+    """
+    size = 2 ** count
+    columns = []
+    for i in range(count):
+        # Runs of 2 ** i false then 2 ** i true, repeated by doubling
+        pattern = ((1 << 2 ** i) - 1) << 2 ** i
+        length = 2 ** (i + 1)
+        while length < size:
+            pattern |= pattern << length
+            length *= 2
+        columns.append(pattern)
+    return columns
+
+
+def bitwise_check(knowledge, query, symbols, assignment=None):
+    """
+    Checks if knowledge base entails query, evaluating both in blocks of
+    up to 2 ** BLOCK_BITS models with bitwise operations.
+    Symbols in `assignment` keep the value given there, and only models
+    over the other `symbols` are checked.
+    """
+    symbols = sorted(symbols)
+    block = min(len(symbols), BLOCK_BITS)
+    mask = (1 << 2 ** block) - 1
+    bits = dict(zip(symbols, truth_table_bits(block)))
+    if assignment:
+        bits.update((name, mask if value else 0)
+                    for name, value in assignment.items())
+
+    # Remaining symbols are constant within a block
+    fixed = symbols[block:]
+    for values in itertools.product((0, mask), repeat=len(fixed)):
+        bits.update(zip(fixed, values))
+        if (knowledge.evaluate_bits(bits, mask)
+                & ~query.evaluate_bits(bits, mask)):
+            return False
+    return True
+
+
+def parallel_model_check(knowledge, query, split=None, processes=None):
+    """
+    Checks if knowledge base entails query by splitting the models into
+    2 ** `split` partitions, each fixing the values of the first `split`
+    symbols, and checking partitions in a pool of `processes` workers.
+    All workers stop as soon as one partition holds a counter-model.
+    """
+    knowledge, query = simplify(knowledge), simplify(query)
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if split is None:
+        # A few partitions per worker evens out uneven partitions
+        split = math.ceil(math.log2(4 * processes))
+    split = min(split, len(symbols))
+    prefix, rest = symbols[:split], symbols[split:]
+    partitions = (
+        (knowledge, query, rest, dict(zip(prefix, values)))
+        for values in itertools.product((False, True), repeat=split)
+    )
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for entailed in pool.imap_unordered(check_partition, partitions):
+            if not entailed:
+                return False
+        return True
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def check_partition(partition):
+    """Checks entailment within one partition of parallel_model_check."""
+    knowledge, query, symbols, assignment = partition
+    return bitwise_check(knowledge, query, symbols, assignment)
+
+
+def model_check_all(knowledge, queries):
+    """
+    Checks which of several queries the knowledge base entails, sharing
+    the work on the knowledge base between them.
+    Returns a dictionary mapping each query to whether it is entailed.
+    """
+    knowledge = simplify(knowledge)
+    simplified = {query: simplify(query) for query in queries}
+    symbols = knowledge.symbols().union(
+        *(query.symbols() for query in simplified.values())
+    )
+    if len(symbols) <= BITWISE_SYMBOLS:
+        entailed = bitwise_check_all(
+            knowledge, list(set(simplified.values())), symbols
+        )
+    else:
+        entailed = sat_check_all(knowledge, list(set(simplified.values())))
+    return {query: entailed[simplified[query]] for query in simplified}
+
+
+def bitwise_check_all(knowledge, queries, symbols):
+    """
+    Checks which queries the knowledge base entails, evaluating the
+    knowledge base once per block of models.
+    """
+    symbols = sorted(symbols)
+    block = min(len(symbols), BLOCK_BITS)
+    mask = (1 << 2 ** block) - 1
+    bits = dict(zip(symbols, truth_table_bits(block)))
+    entailed = {query: True for query in queries}
+    pending = set(entailed)
+
+    fixed = symbols[block:]
+    for values in itertools.product((0, mask), repeat=len(fixed)):
+        if not pending:
+            break
+        bits.update(zip(fixed, values))
+        models = knowledge.evaluate_bits(bits, mask)
+        for query in list(pending):
+            if models & ~query.evaluate_bits(bits, mask):
+                entailed[query] = False
+                pending.remove(query)
+    return entailed
+
+
+def simplify(sentence, assignment=None):
+    """
+    Returns a sentence equivalent to `sentence`, given the symbol values
+    in `assignment`, that is no larger. Nested conjunctions and
+    disjunctions are flattened, duplicate and constant operands removed,
+    and literals that are conjuncts (or disjuncts) are assumed true (or
+    false) in their siblings. Implications and biconditionals with
+    constant or complementary operands are rewritten, and the result is
+    TRUE or FALSE if its value is known.
+    """
+    if assignment is None:
+        assignment = dict()
+
+    if isinstance(sentence, Symbol):
+        if sentence.name in assignment:
+            return Constant(assignment[sentence.name])
+        return sentence
+    if isinstance(sentence, Constant):
+        return sentence
+    if isinstance(sentence, Not):
+        return negate(simplify(sentence.operand, assignment))
+
+    if isinstance(sentence, (And, Or)):
+        conjunction = isinstance(sentence, And)
+        identity, absorbing = (TRUE, FALSE) if conjunction else (FALSE, TRUE)
+        operands = []
+        seen = set()
+        for child in (sentence.conjuncts if conjunction
+                      else sentence.disjuncts):
+            child = simplify(child, assignment)
+            for part in (child.children() if type(child) is type(sentence)
+                         else (child,)):
+                if part is identity or part in seen:
+                    continue
+                if part is absorbing or negate(part) in seen:
+                    return absorbing
+                seen.add(part)
+                operands.append(part)
+
+        # Literal operands fix their symbol's value in the other operands
+        units = dict()
+        literals = []
+        rest = []
+        for operand in operands:
+            literal = literal_value(operand)
+            if literal is None:
+                rest.append(operand)
+            else:
+                name, value = literal
+                units[name] = value if conjunction else not value
+                literals.append(operand)
+        if any(operand.symbols() & units.keys() for operand in rest):
+            rest = [simplify(operand, units) for operand in rest]
+            return simplify(type(sentence)(*literals, *rest), assignment)
+
+        if not operands:
+            return identity
+        if len(operands) == 1:
+            return operands[0]
+        return type(sentence)(*operands)
+
+    if isinstance(sentence, Implication):
+        antecedent = simplify(sentence.antecedent, assignment)
+        consequent = simplify(sentence.consequent, assignment)
+
+        # The consequent only matters where a literal antecedent is true
+        literal = literal_value(antecedent)
+        if literal is not None and literal[0] in consequent.symbols():
+            consequent = simplify(consequent, dict([literal]))
+        if antecedent is TRUE:
+            return consequent
+        if antecedent is FALSE or consequent is TRUE:
+            return TRUE
+        if consequent is FALSE or consequent == negate(antecedent):
+            return negate(antecedent)
+        if antecedent == consequent:
+            return TRUE
+        if antecedent == negate(consequent):
+            return consequent
+        return Implication(antecedent, consequent)
+
+    if isinstance(sentence, Biconditional):
+        left = simplify(sentence.left, assignment)
+        right = simplify(sentence.right, assignment)
+        if isinstance(left, Constant):
+            left, right = right, left
+        if right is TRUE:
+            return left
+        if right is FALSE:
+            return negate(left)
+        if left == right:
+            return TRUE
+        if left == negate(right):
+            return FALSE
+        return Biconditional(left, right)
+
+    raise TypeError("must be a logical sentence")
+
+
+def literal_value(sentence):
+    """
+    Returns the symbol name and the value that makes a literal true, or
+    None if the sentence is not a symbol or a negated symbol.
+    """
+    if isinstance(sentence, Symbol):
+        return sentence.name, True
+    if isinstance(sentence, Not) and isinstance(sentence.operand, Symbol):
+        return sentence.operand.name, False
+    return None
+
+
+def negate(sentence):
+    """Returns the negation of a sentence, without double negations."""
+    if isinstance(sentence, Not):
+        return sentence.operand
+    if isinstance(sentence, Constant):
+        return Constant(not sentence.value)
+    return Not(sentence)
+
+
+def node_count(sentence):
+    """Returns the number of nodes in the tree of a sentence."""
+    return 1 + sum(node_count(child) for child in sentence.children()
+                   if isinstance(child, Sentence))
+
+
+class Tseitin():
+    """
+    Compiles sentences into clauses over integer literals using the
+    Tseitin transformation: every compound subformula is named by a fresh
+    variable defined to be equivalent to it, so the clauses grow linearly
+    with the size of the sentences. Symbols are numbered from 1 in order
+    of first appearance.
+    """
+
+    def __init__(self):
+        self.variables = dict()
+        self.names = dict()
+        self.clauses = []
+        self.count = 0
+        self.definitions = dict()
+
+    def new_var(self):
+        """Returns a fresh variable."""
+        self.count += 1
+        return self.count
+
+    def symbol(self, name):
+        """Returns the variable for a symbol name, creating it if new."""
+        if name not in self.variables:
+            var = self.new_var()
+            self.variables[name] = var
+            self.names[var] = name
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to sentence, adding the clauses that
+        define it. Structurally equal subformulas share one literal.
+        """
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.definitions:
+            return self.definitions[sentence]
+
+        if isinstance(sentence, Constant):
+            # One variable, fixed to true, stands for both constants
+            if TRUE not in self.definitions:
+                self.definitions[TRUE] = self.new_var()
+                self.clauses.append([self.definitions[TRUE]])
+            return self.definitions[TRUE] * (1 if sentence.value else -1)
+
+        if isinstance(sentence, (And, Or)):
+            operands = (sentence.conjuncts if isinstance(sentence, And)
+                        else sentence.disjuncts)
+            literals = [self.literal(operand) for operand in operands]
+            var = self.new_var()
+
+            # An Or is an And with every literal negated
+            sign = 1 if isinstance(sentence, And) else -1
+            for literal in literals:
+                self.clauses.append([-sign * var, sign * literal])
+            self.clauses.append(
+                [sign * var] + [-sign * literal for literal in literals]
+            )
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            var = self.new_var()
+            self.clauses.extend([[-var, -a, b], [var, a], [var, -b]])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            var = self.new_var()
+            self.clauses.extend([[-var, -a, b], [-var, a, -b],
+                                 [var, a, b], [var, -a, -b]])
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.definitions[sentence] = var
+        return var
+
+    def add(self, sentence):
+        """
+        Adds clauses asserting that sentence is true. Top-level
+        conjunctions and disjunctions become clauses directly, without
+        naming variables. Returns the clauses added.
+        """
+        start = len(self.clauses)
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        else:
+            self.clauses.append([self.literal(sentence)])
+        return self.clauses[start:]
+
+    def dimacs(self):
+        """Returns the clauses in DIMACS CNF format."""
+        lines = [f"c {var} {name}" for var, name in self.names.items()]
+        lines.append(f"p cnf {self.count} {len(self.clauses)}")
+        lines.extend(
+            " ".join(str(literal) for literal in clause + [0])
+            for clause in self.clauses
+        )
+        return "\n".join(lines) + "\n"
+
+
+def sat_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by asking a SAT solver whether
+    knowledge and the negation of query can both be true.
+    """
+    compiler = Tseitin()
+    compiler.add(simplify(knowledge))
+    compiler.add(simplify(Not(query)))
+    solver = Solver()
+    for clause in compiler.clauses:
+        solver.add_clause(clause)
+    return not solver.solve()
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that can be told sentences and asked queries many
+    times. Sentences are compiled into one SAT solver as they are added,
+    and the clauses it learns are kept between queries, so each question
+    only costs the work its answer needs rather than a fresh search.
+    """
+
+    def __init__(self, *sentences):
+        self.knowledge = And()
+        self.compiler = Tseitin()
+        self.solver = Solver()
+        self.added = 0
+        self.entailed = set()
+        for sentence in sentences:
+            self.add(sentence)
+
+    def sync(self):
+        """Passes newly compiled clauses on to the solver."""
+        for clause in self.compiler.clauses[self.added:]:
+            self.solver.add_clause(clause)
+        self.added = len(self.compiler.clauses)
+
+    def add(self, sentence):
+        """Tells the knowledge base that sentence is true."""
+        # Conjuncts are added one by one, so the caller's And is not
+        # nested and can still be extended
+        if isinstance(sentence, And) and not sentence._interned:
+            for conjunct in sentence.conjuncts:
+                self.knowledge.add(conjunct)
+        else:
+            self.knowledge.add(sentence)
+        self.compiler.add(simplify(sentence))
+        self.sync()
+
+    def ask(self, query):
+        """Checks if the knowledge base entails query."""
+        # Adding knowledge never retracts an entailment
+        if query in self.entailed:
+            return True
+        literal = self.compiler.literal(simplify(query))
+        self.sync()
+        if self.solver.solve([-literal]):
+            return False
+        self.entailed.add(query)
+        return True
+
+    def ask_all(self, queries):
+        """
+        Checks which queries the knowledge base entails. Every model found
+        also rules out the other queries that are false in it.
+        Returns a dictionary mapping each query to whether it is entailed.
+        """
+        queries = list(queries)
+        entailed = dict()
+        for query in queries:
+            if query in entailed:
+                continue
+            entailed[query] = self.ask(query)
+            if not entailed[query]:
+                model = self.model()
+                for other in queries:
+                    if (other not in entailed
+                            and other.symbols() <= model.keys()
+                            and not other.evaluate(model)):
+                        entailed[other] = False
+        return entailed
+
+    def model(self):
+        """Returns the symbol values of the model the solver last found."""
+        return {name: self.solver.model.get(var, False)
+                for name, var in self.compiler.variables.items()}
+
+
+def sat_check_all(knowledge, queries):
+    """
+    Checks which queries the knowledge base entails with one incremental
+    SAT solver: the knowledge base is compiled once, and each query is
+    refuted under the assumption that it is false.
+    """
+    return KnowledgeBase(knowledge).ask_all(queries)
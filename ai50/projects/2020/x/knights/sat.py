@@ -0,0 +1,279 @@
+import heapq
+
+
+class Solver():
+    """
+    Conflict-driven clause learning SAT solver.
+
+    Variables are positive integers and literals are non-zero integers,
+    negative for a negated variable. Clauses can be added between calls
+    to `solve`, and learned clauses are kept across calls.
+    """
+
+    def __init__(self):
+        self.clauses = []
+        self.watches = dict()
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.polarity = [False]
+        self.trail = []
+        self.trail_limits = []
+        self.queue_head = 0
+        self.order = []
+        self.increment = 1.0
+        self.conflicts = 0
+        self.ok = True
+        self.model = None
+
+    @property
+    def variables(self):
+        """Number of variables known to the solver."""
+        return len(self.values) - 1
+
+    def new_var(self):
+        """Creates a new variable and returns it."""
+        self.values.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.polarity.append(False)
+        var = len(self.values) - 1
+        self.watches[var] = []
+        self.watches[-var] = []
+        heapq.heappush(self.order, (0.0, var))
+        return var
+
+    def reserve(self, var):
+        """Ensures variables up to `var` exist."""
+        while self.variables < var:
+            self.new_var()
+
+    def value(self, literal):
+        """Returns the truth value of a literal, or None if unassigned."""
+        value = self.values[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def add_clause(self, literals):
+        """
+        Adds a clause to the solver.
+        Returns False if the clauses are now known to be unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        clause = []
+        for literal in set(literals):
+            self.reserve(abs(literal))
+            if -literal in clause or self.value(literal) is True:
+                return True
+            if self.value(literal) is None:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(clause)
+        return self.ok
+
+    def attach(self, clause):
+        """Stores a clause, watching its first two literals."""
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def decision_level(self):
+        """Returns the number of decisions currently in effect."""
+        return len(self.trail_limits)
+
+    def assign(self, literal, reason):
+        """Makes a literal true, recording the clause that implied it."""
+        var = abs(literal)
+        self.values[var] = literal > 0
+        self.levels[var] = self.decision_level()
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Performs unit propagation over the watched literals.
+        Returns the index of a conflicting clause, or None.
+        """
+        while self.queue_head < len(self.trail):
+            false_literal = -self.trail[self.queue_head]
+            self.queue_head += 1
+            watchers = self.watches[false_literal]
+            kept = []
+            for position, index in enumerate(watchers):
+                clause = self.clauses[index]
+
+                # Keep the falsified watch in second position
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(clause[0]) is False:
+                        kept.extend(watchers[position + 1:])
+                        self.watches[false_literal] = kept
+                        return index
+                    self.assign(clause[0], index)
+            self.watches[false_literal] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Derives a learned clause from a conflict by resolving back to the
+        first unique implication point.
+        Returns the clause, asserting literal first, and the level to
+        backtrack to.
+        """
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                var = abs(other)
+                if var not in seen and self.levels[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.levels[var] == self.decision_level():
+                        pending += 1
+                    else:
+                        learned.append(other)
+
+            # Resolve on the most recent literal involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if not pending:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+        learned[0] = -literal
+
+        if len(learned) == 1:
+            return learned, 0
+        deepest = max(range(1, len(learned)),
+                      key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, var):
+        """Raises the branching priority of a variable seen in a conflict."""
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[v], v)
+                          for v in range(1, len(self.values))
+                          if self.values[v] is None]
+            heapq.heapify(self.order)
+        elif self.values[var] is None:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def backtrack(self, level):
+        """Undoes all assignments made above decision level `level`."""
+        if self.decision_level() <= level:
+            return
+        limit = self.trail_limits[level]
+        for literal in self.trail[limit:]:
+            var = abs(literal)
+            self.values[var] = None
+            self.reasons[var] = None
+            self.polarity[var] = literal > 0
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[limit:]
+        del self.trail_limits[level:]
+        self.queue_head = min(self.queue_head, limit)
+
+    def pick_branch(self):
+        """Returns the unassigned literal to decide next, or None."""
+        while self.order:
+            _, var = heapq.heappop(self.order)
+            if self.values[var] is None:
+                return var if self.polarity[var] else -var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Decides whether the clauses are satisfiable with every literal in
+        `assumptions` true. On success, `model` maps each variable to its
+        value in a satisfying assignment.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        for literal in assumptions:
+            self.reserve(abs(literal))
+
+        restart_limit = 100
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if self.decision_level() == 0:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.attach(learned))
+                self.increment /= 0.95
+                continue
+
+            # Restart with a geometrically growing conflict budget
+            if conflicts >= restart_limit:
+                self.backtrack(0)
+                conflicts = 0
+                restart_limit = int(restart_limit * 1.5)
+
+            # Assumptions are decided first, one per decision level
+            decision = None
+            while self.decision_level() < len(assumptions):
+                literal = assumptions[self.decision_level()]
+                value = self.value(literal)
+                if value is False:
+                    self.backtrack(0)
+                    return False
+                if value is None:
+                    decision = literal
+                    break
+                self.trail_limits.append(len(self.trail))
+
+            if decision is None:
+                decision = self.pick_branch()
+                if decision is None:
+                    self.model = {
+                        var: bool(self.values[var])
+                        for var in range(1, len(self.values))
+                    }
+                    self.backtrack(0)
+                    return True
+            self.trail_limits.append(len(self.trail))
+            self.assign(decision, None)
@@ -0,0 +1,84 @@
+import argparse
+import itertools
+import random
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI, SOLVERS
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reveal the same safe cells to every solver on seeded "
+                    "boards, and compare what each can deduce from them."
+    )
+    parser.add_argument("--boards", type=int, default=400)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=8)
+    parser.add_argument("--moves", type=int, default=15,
+                        help="safe cells revealed on each board")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first board; board i uses seed + i")
+    args = parser.parse_args()
+
+    known = {solver: [] for solver in SOLVERS}
+    seconds = dict.fromkeys(SOLVERS, 0.0)
+    unstable = dict.fromkeys(SOLVERS, 0)
+    for seed in range(args.seed, args.seed + args.boards):
+        game, moves = reveal(seed, args.height, args.width, args.mines,
+                             args.moves)
+        shuffled = random.Random(seed).sample(moves, len(moves))
+        for solver in SOLVERS:
+            result, elapsed = replay(game, moves, solver)
+            known[solver].append(result)
+            seconds[solver] += elapsed
+            if replay(game, shuffled, solver)[0] != result:
+                unstable[solver] += 1
+
+    print(f"{args.boards} boards of {args.height}x{args.width} with "
+          f"{args.mines} mines, {args.moves} safe cells revealed on each")
+    for solver in SOLVERS:
+        cells = sum(len(mines) + len(safes) for mines, safes in known[solver])
+        print(f"{solver} solver")
+        print(f"  cells known per board: {cells / args.boards:.2f}")
+        print(f"  boards where revealing in another order changes what is "
+              f"known: {unstable[solver]}/{args.boards}")
+        print(f"  add_knowledge seconds: {seconds[solver]:.3f}")
+    for first, second in itertools.permutations(SOLVERS, 2):
+        missed = sum(
+            not (a[0] <= b[0] and a[1] <= b[1])
+            for a, b in zip(known[first], known[second])
+        )
+        print(f"{first} knows cells {second} does not on "
+              f"{missed}/{args.boards} boards")
+
+
+def reveal(seed, height, width, mines, moves):
+    """
+    Returns a seeded game, and up to `moves` of its safe cells in a
+    random order.
+    """
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    safe = [cell for cell in itertools.product(range(height), range(width))
+            if not game.is_mine(cell)]
+    return game, random.sample(safe, min(moves, len(safe)))
+
+
+def replay(game, moves, solver):
+    """
+    Tells an AI using `solver` the count of each move in turn.
+    Returns the cells it then knows to be mines and to be safe, and the
+    seconds spent in add_knowledge.
+    """
+    ai = MinesweeperAI(height=game.height, width=game.width,
+                       mines=len(game.mines), solver=solver)
+    start = time.perf_counter()
+    for move in moves:
+        ai.add_knowledge(move, game.nearby_mines(move))
+    seconds = time.perf_counter() - start
+    return (frozenset(ai.mines), frozenset(ai.safes)), seconds
+
+
+if __name__ == "__main__":
+    main()
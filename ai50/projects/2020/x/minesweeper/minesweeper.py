@@ -1,6 +1,20 @@
+import heapq
 import itertools
-import copy
+import math
 import random
+import time
+
+from collections import deque
+
+# Seconds allowed for enumerating frontier configurations on each guess
+GUESS_TIME = 1.0
+
+# Ways MinesweeperAI can draw conclusions from its knowledge
+SOLVERS = ("subset", "linear")
+
+# Seconds the linear solver allows for searching the configurations of
+# sentences that row reduction leaves undecided, on each reduction
+SEARCH_TIME = 0.1
 
 
 class Minesweeper():
@@ -42,7 +56,7 @@ class Minesweeper():
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.is_mine((i, j)):
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -85,33 +99,207 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+class ArrayMinesweeper(Minesweeper):
+    """
+    Minesweeper game stored in flat byte arrays, one byte per cell, for
+    boards too large for lists of lists. Every neighbour count is worked
+    out once when the board is made, so nearby_mines is a lookup.
+    """
+
+    def __init__(self, height=8, width=8, mines=8):
+
+        # Set initial width, height, and number of mines
+        self.height = height
+        self.width = width
+        self.mine_count = mines
+
+        # Add mines at a random sample of distinct cells
+        self.board = bytearray(height * width)
+        for position in random.sample(range(height * width), mines):
+            self.board[position] = 1
+        self.counts = neighbour_counts(self.board, height, width)
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    @property
+    def mines(self):
+        """Returns the set of cells containing mines."""
+        return {divmod(position, self.width)
+                for position in range(len(self.board))
+                if self.board[position]}
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.board[i * self.width + j])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        return self.counts[i * self.width + j]
+
+    def won(self):
+        """
+        Checks if all mines have been flagged.
+        """
+        return (len(self.mines_found) == self.mine_count
+                and all(self.is_mine(cell) for cell in self.mines_found))
+
+
+def neighbour_counts(board, height, width):
+    """
+    Returns a byte array of the number of mines around each cell of a
+    flat byte array `board` of 0s and 1s.
+
+    This is the convolution of the board with a 3 x 3 kernel of ones,
+    done a row at a time on rows read as integers with one byte per
+    cell: shifting a row by a byte either way and adding sums each cell
+    with its left and right neighbours, and adding the sums of adjacent
+    rows completes the square. Counts are at most 9, so no byte carries
+    into the next.
+    """
+    mask = (1 << 8 * width) - 1
+    rows = [int.from_bytes(board[i * width:(i + 1) * width], "little")
+            for i in range(height)]
+    across = [(row + (row << 8) + (row >> 8)) & mask for row in rows]
+
+    counts = bytearray(height * width)
+    for i in range(height):
+        total = across[i] - rows[i]
+        if i > 0:
+            total += across[i - 1]
+        if i < height - 1:
+            total += across[i + 1]
+        counts[i * width:(i + 1) * width] = total.to_bytes(width, "little")
+    return counts
+
+
+class CellEncoder():
+    """
+    Assigns board cells to bit positions for Sentence masks. Positions
+    of cells that no sentence will mention again can be released, and
+    are reused lowest first, so masks stay about as wide as the number
+    of cells still in play rather than the board.
+    """
+
+    def __init__(self):
+        self.positions = dict()
+        self.cells_at = []
+        self.free = []
+
+    def bit(self, cell):
+        """Returns the mask bit of a cell, assigning it if new."""
+        position = self.positions.get(cell)
+        if position is None:
+            if self.free:
+                position = heapq.heappop(self.free)
+                self.cells_at[position] = cell
+            else:
+                position = len(self.cells_at)
+                self.cells_at.append(cell)
+            self.positions[cell] = position
+        return 1 << position
+
+    def encode(self, cells):
+        """Returns the mask of a collection of cells."""
+        mask = 0
+        for cell in cells:
+            mask |= self.bit(cell)
+        return mask
+
+    def decode(self, mask):
+        """Yields the cells of a mask."""
+        while mask:
+            low = mask & -mask
+            yield self.cells_at[low.bit_length() - 1]
+            mask ^= low
+
+    def release(self, cell):
+        """
+        Frees the position of a cell, which must no longer be in any
+        mask that will be used.
+        """
+        position = self.positions.pop(cell, None)
+        if position is not None:
+            self.cells_at[position] = None
+            heapq.heappush(self.free, position)
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    Cells are stored as the bits of an integer `mask`, with positions
+    given by `encoder`, so that comparing and subtracting sentences are
+    integer operations. `cells` decodes them back to a set of cells.
+    Sentences compared or combined must share an encoder; each
+    MinesweeperAI has its own, and other sentences share `shared`.
     """
 
-    def __init__(self, cells, count):
-        self.cells = set(cells)
+    # Encoder for sentences made without one
+    shared = CellEncoder()
+
+    # Low bits of the mask that are hashed along with its highest bit.
+    # Hashing the whole mask would take time in its width, and Python
+    # hashes integers modulo 2**61 - 1, under which masks of cells 61
+    # positions apart collide.
+    HASH_BITS = (1 << 64) - 1
+
+    def __init__(self, cells, count, encoder=None):
+        self.encoder = Sentence.shared if encoder is None else encoder
+        self.mask = self.encoder.encode(cells)
         self.count = count
 
+    @classmethod
+    def from_mask(cls, mask, count, encoder):
+        """Returns a sentence for cells already encoded as a mask."""
+        sentence = cls.__new__(cls)
+        sentence.encoder = encoder
+        sentence.mask = mask
+        sentence.count = count
+        return sentence
+
+    @property
+    def cells(self):
+        return set(self.encoder.decode(self.mask))
+
+    def __len__(self):
+        return self.mask.bit_count()
+
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        return self.mask == other.mask and self.count == other.count
+
+    def __hash__(self):
+        return hash((self.mask.bit_length(), self.mask & Sentence.HASH_BITS,
+                     self.count))
 
     def __sub__(self, other):
-        return Sentence(self.cells - other.cells, self.count - other.count)
+        return Sentence.from_mask(self.mask & ~other.mask,
+                                  self.count - other.count, self.encoder)
 
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def is_proper_subset(self, other):
+        """
+        Checks if the cells of this sentence are a proper subset of the
+        cells of another.
+        """
+        return self.mask != other.mask and not self.mask & ~other.mask
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
         - mine(s) can be inferred when the number of known mines (count)
           matches the number of cells under consideration.
         """
-        if len(self.cells) == self.count:
+        if len(self) == self.count:
             return self.cells
 
     def known_safes(self):
@@ -129,8 +317,9 @@ class Sentence():
         a cell is known to be a mine.
          - removes known mine from list of unknowns, decrements count.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
+        position = self.encoder.positions.get(cell)
+        if position is not None and self.mask >> position & 1:
+            self.mask ^= 1 << position
             self.count -= 1
 
     def mark_safe(self, cell):
@@ -139,8 +328,9 @@ class Sentence():
         a cell is known to be safe.
          - removes known safe from list of unknowns.
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
+        position = self.encoder.positions.get(cell)
+        if position is not None and self.mask >> position & 1:
+            self.mask ^= 1 << position
 
 
 class MinesweeperAI():
@@ -148,11 +338,21 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=8, solver="subset"):
 
-        # Set initial height and width
+        # Set initial height, width, and total number of mines
         self.height = height
         self.width = width
+        self.total_mines = mines
+
+        # Rules used to combine sentences, one of SOLVERS: "subset" applies
+        # the subset rule, and "linear" also row reduces the sentences
+        if solver not in SOLVERS:
+            raise ValueError(f"unknown solver {solver}")
+        self.solver = solver
+
+        # Cells of sentences added to knowledge since the last reduction
+        self.touched = set()
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -161,8 +361,36 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells in the order found, some possibly already chosen
+        self.ready = deque()
+
+        # Cells not chosen nor known to be safe or mines, in no order,
+        # with the position of each so that any can be removed at once
+        self.unknown = list(itertools.product(range(height), range(width)))
+        self.unknown_positions = {
+            cell: position for position, cell in enumerate(self.unknown)
+        }
+
+        # Unknown cells in no sentence, kept the same way
+        self.outside = list(self.unknown)
+        self.outside_positions = dict(self.unknown_positions)
+
+        # Set of sentences about the game known to be true, none of which
+        # is trivial, closed under the subset rule
+        self.knowledge = set()
+
+        # Sentences still to be checked against knowledge, keyed by id
+        self.pending = dict()
+
+        # Sentences containing each cell, keyed by sentence id
+        self.index = dict()
+
+        # Bit positions of the cells in sentences
+        self.encoder = CellEncoder()
+
+        # Time budget and result of the last frontier_probabilities call,
+        # cleared whenever knowledge changes
+        self.probabilities = None
 
     def mark_mine(self, cell):
         """
@@ -170,17 +398,60 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        self.probabilities = None
+        swap_remove(self.unknown, self.unknown_positions, cell)
+        swap_remove(self.outside, self.outside_positions, cell)
+        for sentence in self.index.pop(cell, dict()).values():
+            self.reopen(sentence)
             sentence.mark_mine(cell)
+        self.encoder.release(cell)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell not in self.safes and cell not in self.moves_made:
+            self.ready.append(cell)
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        self.probabilities = None
+        swap_remove(self.unknown, self.unknown_positions, cell)
+        swap_remove(self.outside, self.outside_positions, cell)
+        for sentence in self.index.pop(cell, dict()).values():
+            self.reopen(sentence)
             sentence.mark_safe(cell)
+        self.encoder.release(cell)
+
+    def add_sentence(self, sentence):
+        """
+        Queues a sentence to be checked against knowledge, indexing it
+        under each of its cells.
+        """
+        self.pending[id(sentence)] = sentence
+        self.probabilities = None
+        for cell in self.encoder.decode(sentence.mask):
+            self.index.setdefault(cell, dict())[id(sentence)] = sentence
+            swap_remove(self.outside, self.outside_positions, cell)
+
+    def remove_sentence(self, sentence):
+        """
+        Removes a sentence from the index. It must not be in knowledge.
+        """
+        self.probabilities = None
+        for cell in self.encoder.decode(sentence.mask):
+            del self.index[cell][id(sentence)]
+            if not self.index[cell]:
+                self.outside_positions[cell] = len(self.outside)
+                self.outside.append(cell)
+
+    def reopen(self, sentence):
+        """
+        Moves a sentence about to change from knowledge back to pending,
+        as it must be checked again once changed.
+        """
+        if id(sentence) not in self.pending:
+            self.knowledge.remove(sentence)
+            self.pending[id(sentence)] = sentence
 
     def explore_neighbours(self, cell, count):
         neighbours = set()
@@ -219,50 +490,124 @@ class MinesweeperAI():
 
         # group unidentified neighbours and mine count
         unsolved_neighbours, unsolved_mines = self.explore_neighbours(cell, count)
-        self.knowledge.append(Sentence(unsolved_neighbours, unsolved_mines))
+        self.add_sentence(Sentence(unsolved_neighbours, unsolved_mines,
+                                   self.encoder))
 
         # generate all possible new inferences and sentences in knowledge
-        to_update = 1
-        while to_update:
-            self.infer_from_knowledge()
-            to_update = self.new_sentence_from_knowledge()
-
-    def infer_from_knowledge(self):
-        """
-        Scan sentences in knowledge to see which now implicate
-        safe cells or mines. Update sentences where possible.
-        """
-        for s in self.knowledge:
-            safes_list = copy.deepcopy(s.known_safes())
-            if safes_list:
-                for safe in safes_list:
-                    self.mark_safe(safe)
-
-            mines_list = copy.deepcopy(s.known_mines())
-            if mines_list:
-                for mine in mines_list:
-                    self.mark_mine(mine)
-
-    def new_sentence_from_knowledge(self):
-        """
-        Compare sentences in knowledge to identify none-empty, proper
-        subsets. Generate new, more specific sentences, based on
-        subset rule.
-        """
-        updates = 0
-
-        for s1 in self.knowledge:
-            for s2 in self.knowledge:
-                # check non-empty s1 set is subset of s2 set
-                if s1.cells and s1.cells < s2.cells:
-                    # subtract subset from superset and add to knowledge
-                    difference = copy.deepcopy(s2) - s1
-                    self.knowledge.append(difference)
-                    # remove redundant superset
-                    self.knowledge.remove(s2)
-                    updates += 1
-        # updated sentences must be assessed for new inferences
-        return updates
+        self.infer()
+        if self.solver == "linear":
+            while self.eliminate():
+                self.infer()
+
+    def infer(self):
+        """
+        Checks pending sentences one at a time until none are left.
+        Checking a sentence may mark cells or derive new sentences, which
+        queues the sentences they touch, so only sentences affected by
+        the last change are ever re-examined.
+        """
+        while self.pending:
+            key = next(iter(self.pending))
+            self.check_sentence(self.pending.pop(key))
+
+    def check_sentence(self, sentence):
+        """
+        Adds a pending sentence to knowledge, unless it is redundant.
+        - all cells are safe or all are mines: mark them instead.
+        - an identical sentence is already known: drop it.
+        - otherwise, apply the subset rule against every known sentence
+          sharing a cell with it, queueing the difference of each pair,
+          and with the linear solver note its cells for row reduction.
+        Supersets are kept, since removing them loses deductions, which
+        also makes the result independent of the order of checks.
+        """
+        cells = list(self.encoder.decode(sentence.mask))
+        if not cells:
+            return
+        if sentence.count == 0 or sentence.count == len(cells):
+            self.remove_sentence(sentence)
+            for cell in cells:
+                if sentence.count:
+                    self.mark_mine(cell)
+                else:
+                    self.mark_safe(cell)
+            return
+        if sentence in self.knowledge:
+            self.remove_sentence(sentence)
+            return
+        if self.solver == "linear":
+            self.touched.update(cells)
+
+        overlapping = dict()
+        for cell in cells:
+            overlapping.update(self.index[cell])
+        for other in overlapping.values():
+            if id(other) in self.pending:
+                continue
+            if other.is_proper_subset(sentence):
+                self.add_sentence(sentence - other)
+            elif sentence.is_proper_subset(other):
+                self.add_sentence(other - sentence)
+        self.knowledge.add(sentence)
+
+    def eliminate(self):
+        """
+        Finds cells forced by several sentences at once: every sentence
+        is an equation that its cells, as 0 or 1, sum to its count, and
+        the equations are row reduced together. A reduced equation whose
+        count is the largest or smallest sum its coefficients allow
+        fixes every cell in it. Marks the cells found and returns
+        whether there were any.
+
+        Only groups of sentences linked by shared cells that have changed
+        since the last call are reduced, each on its own. Reduced
+        equations can hide cells that fewer of the sentences would have
+        fixed, so a group where reduction finds nothing has its mine
+        configurations searched, within SEARCH_TIME seconds, for every
+        cell it fixes. This makes what is known independent of the order
+        of moves, unless the search runs out of time.
+        """
+        starts = [sentence for cell in self.touched
+                  for sentence in self.index.get(cell, dict()).values()]
+        self.touched = set()
+        deadline = time.perf_counter() + SEARCH_TIME
+
+        mines = set()
+        safes = set()
+        for cells, sentences in self.components(starts):
+            found = len(mines) + len(safes)
+            rows = [
+                ({cell: 1 for cell in self.encoder.decode(sentence.mask)},
+                 sentence.count)
+                for sentence in sentences
+            ]
+            for coefficients, total in row_reduce(rows):
+                low = sum(c for c in coefficients.values() if c < 0)
+                high = sum(c for c in coefficients.values() if c > 0)
+                if total not in (low, high) or low == high:
+                    continue
+                for cell, coefficient in coefficients.items():
+                    if (coefficient > 0) == (total == high):
+                        mines.add(cell)
+                    else:
+                        safes.add(cell)
+            if len(mines) + len(safes) > found:
+                continue
+
+            try:
+                forced_mines, forced_safes = forced_cells(
+                    cells, sentences, deadline
+                )
+            except (TimeoutError, ValueError):
+                continue
+            mines.update(forced_mines)
+            safes.update(forced_safes)
+
+        for cell in mines:
+            self.mark_mine(cell)
+        for cell in safes:
+            self.mark_safe(cell)
+        return bool(mines or safes)
 
     def make_safe_move(self):
         """
@@ -273,9 +618,11 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        options = list(copy.deepcopy(self.safes) - self.moves_made)
-        if options:
-            return options.pop()
+        # drop safe cells chosen since they were found
+        while self.ready and self.ready[0] in self.moves_made:
+            self.ready.popleft()
+        if self.ready:
+            return self.ready[0]
 
     def make_random_move(self):
         """
@@ -283,10 +630,428 @@ class MinesweeperAI():
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        Among those, picks one of the cells least likely to be a mine.
+        Cells outside every sentence are all equally likely, so they are
+        drawn from as a group rather than listed.
+        """
+        safe = self.make_safe_move()
+        if safe is not None:
+            return safe
+        if not self.unknown:
+            return None
+
+        frontier, elsewhere = self.frontier_probabilities()
+        others = len(self.outside)
+        lowest = min(frontier.values(), default=1.0)
+        if others:
+            lowest = min(lowest, elsewhere)
+        tied = [cell for cell, probability in frontier.items()
+                if probability <= lowest + 1e-9]
+        if others and elsewhere <= lowest + 1e-9:
+            choice = random.randrange(len(tied) + others)
+        else:
+            choice = random.randrange(len(tied))
+        if choice < len(tied):
+            return tied[choice]
+        return self.outside[choice - len(tied)]
+
+    def mine_probabilities(self, time_budget=GUESS_TIME):
+        """
+        Returns a dictionary from every cell not yet chosen and not known
+        to be a mine, to the probability that it is a mine.
         """
-        # seen = copy.deepcopy(self.moves_made)
-        # mines = copy.deepcopy(self.mines)
+        frontier, elsewhere = self.frontier_probabilities(time_budget)
+        probabilities = dict()
+        for cell in itertools.product(range(self.height), range(self.width)):
+            if cell in self.safes:
+                if cell not in self.moves_made:
+                    probabilities[cell] = 0.0
+            elif cell in self.unknown_positions:
+                probabilities[cell] = frontier.get(cell, elsewhere)
+        return probabilities
+
+    def frontier_probabilities(self, time_budget=GUESS_TIME):
+        """
+        Returns a dictionary from each unknown cell in some sentence to
+        the probability that it is a mine, and the probability for every
+        other unknown cell.
+
+        Cells in knowledge are split into independent components, whose
+        consistent mine configurations are enumerated separately. The
+        components are then combined, weighting each total number of
+        frontier mines by the ways of placing the remaining mines among
+        the other unknown cells. If this runs past `time_budget` seconds,
+        each frontier cell falls back to the highest mine ratio of the
+        sentences containing it. The result is reused until knowledge
+        changes.
+        """
+        if self.probabilities is None or self.probabilities[0] != time_budget:
+            deadline = time.perf_counter() + time_budget
+            try:
+                result = self.combine_components(deadline)
+            except (TimeoutError, ValueError):
+                result = self.local_probabilities()
+            self.probabilities = (time_budget, result)
+        return self.probabilities[1]
+
+    def combine_components(self, deadline):
+        """
+        Returns frontier_probabilities computed exactly.
+        Raises TimeoutError if still running at `deadline`, and
+        ValueError if knowledge is inconsistent.
+        """
+        remaining = self.total_mines - len(self.mines)
+        components = [
+            (cells, enumerate_configurations(cells, sentences, deadline))
+            for cells, sentences in self.components()
+        ]
+
+        frontier = sum(len(cells) for cells, _ in components)
+        others = len(self.unknown) - frontier
+
+        # distribution of frontier mines outside each component
+        totals = [1.0]
+        excluding = []
+        for index in range(len(components)):
+            rest = [1.0]
+            for other, (_, (counts, _)) in enumerate(components):
+                if other != index:
+                    rest = convolve(rest, counts, deadline)
+            excluding.append(rest)
+        for _, (counts, _) in components:
+            totals = convolve(totals, counts, deadline)
+
+        # ways of placing the remaining mines among unconstrained cells
+        logs = {
+            mines: log_binomial(others, remaining - mines)
+            for mines in range(len(totals))
+            if 0 <= remaining - mines <= others
+        }
+        if not logs:
+            # the total number of mines does not fit what is known
+            logs = {mines: 0.0 for mines in range(len(totals))}
+        largest = max(logs.values())
+        ways = [math.exp(logs[mines] - largest) if mines in logs else 0.0
+                for mines in range(len(totals))]
+
+        weight = sum(count * ways[mines] for mines, count in enumerate(totals))
+        if weight == 0:
+            raise ValueError("knowledge is inconsistent")
+
+        probabilities = dict()
+        for (cells, (counts, cell_counts)), rest in zip(components, excluding):
+            # weight of the component holding k mines
+            weights = []
+            for k in range(len(counts)):
+                if time.perf_counter() > deadline:
+                    raise TimeoutError
+                weights.append(sum(count * ways[k + mines]
+                                   for mines, count in enumerate(rest)))
+            for cell, by_mines in zip(cells, cell_counts):
+                if time.perf_counter() > deadline:
+                    raise TimeoutError
+                probabilities[cell] = sum(
+                    count * weights[k] for k, count in by_mines.items()
+                ) / weight
+
+        elsewhere = 0.0
+        if others:
+            elsewhere = sum(
+                count * ways[mines] * (remaining - mines)
+                for mines, count in enumerate(totals)
+            ) / weight / others
+
+        # order by cell, as components are found in no particular order
+        return dict(sorted(probabilities.items())), elsewhere
+
+    def components(self, starts=None):
+        """
+        Yields (cells, sentences) for each group of knowledge sentences
+        connected by shared cells, with the cells ordered so that each
+        sentence's cells are close together. If `starts` is given, only
+        groups containing one of those sentences are yielded.
+        """
+        seen = set()
+        for start in self.knowledge if starts is None else starts:
+            if start in seen:
+                continue
+            seen.add(start)
+            sentences = [start]
+            cells = []
+            placed = set()
+            queue = deque([start])
+            while queue:
+                sentence = queue.popleft()
+                for cell in self.encoder.decode(sentence.mask):
+                    if cell in placed:
+                        continue
+                    placed.add(cell)
+                    cells.append(cell)
+                    for other in self.index[cell].values():
+                        if other not in seen and id(other) not in self.pending:
+                            seen.add(other)
+                            sentences.append(other)
+                            queue.append(other)
+            yield cells, sentences
+
+    def local_probabilities(self):
+        """
+        Returns rough mine probabilities in the same form as
+        frontier_probabilities: for each unknown cell in some sentence,
+        the highest ratio of mines to cells among those sentences, and
+        the density of the remaining mines for every other cell.
+        """
+        probabilities = dict()
+        for cell, sentences in sorted(self.index.items()):
+            if sentences:
+                probabilities[cell] = max(sentence.count / len(sentence)
+                                          for sentence in sentences.values())
+        density = (self.total_mines - len(self.mines)) / len(self.unknown)
+        return probabilities, density
+
+
+def swap_remove(items, positions, item):
+    """
+    Removes an item, if there, from a list whose positions are kept in
+    the dictionary `positions`, by moving the last item into its place.
+    """
+    position = positions.pop(item, None)
+    if position is None:
+        return
+    last = items.pop()
+    if position < len(items):
+        items[position] = last
+        positions[last] = position
+
+
+def configuration_moves(cells, sentences, deadline):
+    """
+    Returns the ways of assigning mines to `cells`, in order, that can
+    still meet every sentence. Partial assignments are merged when they
+    leave the same counts still needed by the sentences they have
+    started, so the work grows with the number of such states rather
+    than of assignments. moves[i] lists (state, mine, after) for each
+    state reachable before cells[i] is assigned and each number of mines
+    it can take from there.
+    Raises TimeoutError if still running at `deadline`.
+    """
+    position = {cell: i for i, cell in enumerate(cells)}
+    members = [sorted(position[cell] for cell in s.encoder.decode(s.mask))
+               for s in sentences]
+
+    # sentences containing each cell, with how many of their cells follow
+    containing = [[] for _ in cells]
+    for j, indices in enumerate(members):
+        for rank, i in enumerate(indices):
+            containing[i].append((j, len(indices) - rank - 1))
+
+    # sentences with cells both before and from each position, whose
+    # outstanding counts make up the state there
+    started = [[] for _ in range(len(cells) + 1)]
+    for j, indices in enumerate(members):
+        for i in range(indices[0] + 1, indices[-1] + 1):
+            started[i].append(j)
+
+    # for each position, how to find each sentence's outstanding count in
+    # the state before it: the position of the count in the state, or
+    # None with the sentence's count if it starts there, and the cells
+    # that follow if the sentence contains the cell, or None. Sentences
+    # ending at the cell come last, as they are checked but not kept.
+    plans = []
+    for i in range(len(cells)):
+        where = {j: p for p, j in enumerate(started[i])}
+        follow = dict(containing[i])
+        order = started[i + 1] + [j for j in follow
+                                  if j not in started[i + 1]]
+        plans.append([(where.get(j), sentences[j].count, follow.get(j))
+                      for j in order])
+
+    def step(i, state, mine):
+        """
+        Returns the state after giving cells[i] `mine` mines, or None if
+        some sentence could then no longer be met.
+        """
+        after = []
+        for position, count, left in plans[i]:
+            value = count if position is None else state[position]
+            if left is not None:
+                value -= mine
+                if value < 0 or value > left:
+                    return None
+            after.append(value)
+        return tuple(after[:len(started[i + 1])])
+
+    moves = []
+    reachable = {()}
+    for i in range(len(cells)):
+        layer = set()
+        moves.append([])
+        for state in reachable:
+            if time.perf_counter() > deadline:
+                raise TimeoutError
+            for mine in (0, 1):
+                after = step(i, state, mine)
+                if after is not None:
+                    moves[i].append((state, mine, after))
+                    layer.add(after)
+        reachable = layer
+    return moves
+
+
+def enumerate_configurations(cells, sentences, deadline):
+    """
+    Counts the assignments of mines to `cells` consistent with every
+    sentence, over the moves of configuration_moves. A forward pass
+    counts the ways to reach each state by number of mines so far, a
+    backward pass the ways to complete it, and the two together give
+    each cell's counts.
+
+    Returns (counts, cell_counts): counts[k] is the number of consistent
+    assignments with k mines, scaled so the largest is 1, and
+    cell_counts[i] maps k to how many of those have cells[i] as a mine.
+    Raises TimeoutError if still running at `deadline`, and ValueError
+    if no assignment is consistent.
+    """
+    moves = configuration_moves(cells, sentences, deadline)
+
+    # forward pass: ways to reach each state, by mines placed so far
+    forward = [{(): {0: 1}}]
+    for i in range(len(cells)):
+        layer = dict()
+        for state, mine, after in moves[i]:
+            if time.perf_counter() > deadline:
+                raise TimeoutError
+            target = layer.setdefault(after, dict())
+            for k, count in forward[i][state].items():
+                target[k + mine] = target.get(k + mine, 0) + count
+        forward.append(layer)
+
+    # backward pass: ways to complete each state, by mines still to
+    # place, collecting each cell's counts on the way
+    completed = {(): {0: 1}}
+    cell_counts = [dict() for _ in cells]
+    for i in reversed(range(len(cells))):
+        layer = dict()
+        for state, mine, after in moves[i]:
+            if time.perf_counter() > deadline:
+                raise TimeoutError
+            rest = completed.get(after)
+            if rest is None:
+                continue
+            target = layer.setdefault(state, dict())
+            for k, count in rest.items():
+                target[k + mine] = target.get(k + mine, 0) + count
+            if mine:
+                counts = cell_counts[i]
+                for before, ways in forward[i][state].items():
+                    for k, count in rest.items():
+                        total = before + 1 + k
+                        counts[total] = counts.get(total, 0) + ways * count
+        completed = layer
+        forward[i + 1] = moves[i] = None
+
+    totals = completed.get((), dict())
+    if not totals:
+        raise ValueError("knowledge is inconsistent")
+    largest = max(totals.values())
+    return ([totals.get(k, 0) / largest for k in range(max(totals) + 1)],
+            [{k: count / largest for k, count in counts.items()}
+             for counts in cell_counts])
+
+
+def forced_cells(cells, sentences, deadline):
+    """
+    Returns the cells that are mines, and the cells that are safe, in
+    every assignment of mines to `cells` consistent with every sentence,
+    found by a backward pass over the moves of configuration_moves that
+    keeps only those from which every sentence can still be met.
+    Raises TimeoutError if still running at `deadline`, and ValueError
+    if no assignment is consistent.
+    """
+    moves = configuration_moves(cells, sentences, deadline)
+    values = [set() for _ in cells]
+    completable = {()}
+    for i in reversed(range(len(cells))):
+        layer = set()
+        for state, mine, after in moves[i]:
+            if time.perf_counter() > deadline:
+                raise TimeoutError
+            if after in completable:
+                layer.add(state)
+                values[i].add(mine)
+        completable = layer
+    if () not in completable:
+        raise ValueError("knowledge is inconsistent")
+    return ([cell for cell, taken in zip(cells, values) if taken == {1}],
+            [cell for cell, taken in zip(cells, values) if taken == {0}])
+
+
+def row_reduce(rows):
+    """
+    Returns the reduced row echelon form of a system of linear equations,
+    each a pair of a dictionary from variable to nonzero integer
+    coefficient and the integer total. Rows are combined with integer
+    arithmetic and divided by their greatest common divisor, so there
+    are no fractions. Rows that reduce to nothing are left out.
+    """
+    reduced = dict()
+    for coefficients, total in rows:
+        row = (dict(coefficients), total)
+        for pivot in [cell for cell in row[0] if cell in reduced]:
+            row = combine(row, reduced[pivot], pivot)
+        if not row[0]:
+            continue
+
+        pivot = min(row[0])
+        for other in reduced:
+            if pivot in reduced[other][0]:
+                reduced[other] = combine(reduced[other], row, pivot)
+        reduced[pivot] = row
+    return list(reduced.values())
+
+
+def combine(row, pivot_row, pivot):
+    """
+    Returns `row` with the variable `pivot` eliminated by subtracting a
+    multiple of `pivot_row`, scaled down to the smallest integers.
+    """
+    coefficients, total = row
+    pivot_coefficients, pivot_total = pivot_row
+    a = pivot_coefficients[pivot]
+    b = coefficients[pivot]
+
+    result = {cell: a * value for cell, value in coefficients.items()}
+    for cell, value in pivot_coefficients.items():
+        value = result.get(cell, 0) - b * value
+        if value:
+            result[cell] = value
+        else:
+            result.pop(cell, None)
+    total = a * total - b * pivot_total
+
+    divisor = math.gcd(total, *result.values())
+    if divisor > 1:
+        result = {cell: value // divisor for cell, value in result.items()}
+        total //= divisor
+    return result, total
+
+
+def convolve(first, second, deadline=math.inf):
+    """
+    Returns the distribution of the sum of two independent counts, given
+    the weight of each value of each.
+    Raises TimeoutError if still running at `deadline`.
+    """
+    result = [0.0] * (len(first) + len(second) - 1)
+    for i, a in enumerate(first):
+        if time.perf_counter() > deadline:
+            raise TimeoutError
+        if a:
+            for j, b in enumerate(second):
+                result[i + j] += a * b
+    return result
+
 
-        for i in itertools.product(range(self.height), range(self.width)):
-            if i not in self.moves_made and i not in self.mines:
-                return i
\ No newline at end of file
+def log_binomial(n, k):
+    """Returns the natural logarithm of n choose k."""
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
@@ -0,0 +1,143 @@
+import argparse
+import math
+import os
+import random
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import ArrayMinesweeper, Minesweeper, MinesweeperAI, SOLVERS
+
+# Latency percentiles reported for each AI call
+PERCENTILES = (50, 90, 99)
+
+# Board representations that games can be played on
+BOARDS = {"list": Minesweeper, "array": ArrayMinesweeper}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play seeded Minesweeper games against the AI without "
+                    "a display, and report its strength and speed."
+    )
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=8)
+    parser.add_argument("--board", default="list", choices=BOARDS,
+                        help="array stores the board in byte arrays, for "
+                             "large boards")
+    parser.add_argument("--solver", nargs="+", default=["subset"],
+                        choices=SOLVERS,
+                        help="solvers to compare on the same seeds")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game; game i uses seed + i")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    for solver in args.solver:
+        start = time.perf_counter()
+        results = simulate(range(args.seed, args.seed + args.games),
+                           args.height, args.width, args.mines,
+                           args.processes, args.board, solver)
+        seconds = time.perf_counter() - start
+        print(f"{solver} solver")
+        for line in report(results):
+            print(f"  {line}")
+        print(f"  {args.games} games in {seconds:.1f}s")
+
+
+def simulate(seeds, height, width, mines, processes=None, board="list",
+             solver="subset"):
+    """
+    Plays one game per seed across a pool of `processes` workers, on
+    the `board` representation named in BOARDS, with an AI using
+    `solver`.
+    Returns the result of each game, in the order of `seeds`.
+    """
+    seeds = list(seeds)
+    chunksize = max(1, len(seeds) // (4 * (processes or os.cpu_count())))
+    with ProcessPoolExecutor(processes) as executor:
+        return list(executor.map(
+            play, seeds, [height] * len(seeds), [width] * len(seeds),
+            [mines] * len(seeds), [board] * len(seeds),
+            [solver] * len(seeds), chunksize=chunksize
+        ))
+
+
+def play(seed, height, width, mines, board="list", solver="subset"):
+    """
+    Plays one game: the AI makes a safe move when it knows one, and a
+    random move otherwise, until it reveals every safe cell or hits a
+    mine. The seed fixes both the board and the AI's random choices.
+    Returns a dictionary of the outcome and the seconds taken by each
+    call to the AI.
+    """
+    random.seed(seed)
+    game = BOARDS[board](height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines,
+                       solver=solver)
+    result = {"seed": seed, "won": False, "moves": 0, "guesses": 0,
+              "knowledge": [], "move": []}
+
+    while result["moves"] < height * width - mines:
+        start = time.perf_counter()
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            result["guesses"] += 1
+        result["move"].append(time.perf_counter() - start)
+        if move is None:
+            break
+        result["moves"] += 1
+        if game.is_mine(move):
+            return result
+
+        count = game.nearby_mines(move)
+        start = time.perf_counter()
+        ai.add_knowledge(move, count)
+        result["knowledge"].append(time.perf_counter() - start)
+    else:
+        result["won"] = True
+    return result
+
+
+def percentile(values, percent):
+    """
+    Returns the smallest value at or above `percent` percent of a sorted
+    list of values.
+    """
+    if not values:
+        return float("nan")
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(rank, 1) - 1]
+
+
+def report(results):
+    """
+    Yields lines summarising a list of game results: win rate with its
+    standard error, moves and guesses per game, and latency percentiles in
+    milliseconds for add_knowledge and for move selection.
+    """
+    games = len(results)
+    wins = sum(result["won"] for result in results)
+    rate = wins / games
+    error = math.sqrt(rate * (1 - rate) / games)
+    moves = sum(result["moves"] for result in results) / games
+    guesses = sum(result["guesses"] for result in results) / games
+    yield f"win rate: {rate:.1%} ± {error:.1%} ({wins}/{games})"
+    yield f"moves per game: {moves:.1f}, of which guesses: {guesses:.2f}"
+
+    for name, key in (("add_knowledge", "knowledge"), ("move", "move")):
+        latencies = sorted(
+            seconds for result in results for seconds in result[key]
+        )
+        columns = [f"p{percent} {percentile(latencies, percent) * 1000:.3f}"
+                   for percent in PERCENTILES]
+        columns.append(f"max {latencies[-1] * 1000:.3f}" if latencies
+                       else "max nan")
+        yield f"{name} ms: " + "  ".join(columns)
+
+
+if __name__ == "__main__":
+    main()